@@ -1,180 +1,230 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, union_all
+import hashlib
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 from typing import Optional
 
+import numpy as np
+import orjson
+
+from app.core.cache import cache_get, cache_set
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
-from app.models.content import Draft, Post, EngagementMetrics
+from app.models.content import DailyUserRollup, Draft, Post, EngagementMetrics
 
 router = APIRouter()
 
+# Cache TTLs (seconds) per analytics range; longer ranges change more slowly
+ANALYTICS_CACHE_TTL = {"week": 60, "month": 120, "quarter": 300}
+
+ANALYTICS_RANGE_DAYS = {"week": 7, "month": 30, "quarter": 90}
+
+# Mock payloads, built once at import
+MOCK_TOP_THEMES = (
+    {"theme": "AI Strategy", "posts": 8, "engagement": 156},
+    {"theme": "Content Marketing", "posts": 6, "engagement": 142},
+    {"theme": "Industry Insights", "posts": 4, "engagement": 98}
+)
+
+MOCK_BEST_PERFORMING_CONTENT = (
+    {
+        "id": 1,
+        "content": "5 AI trends that will shape 2024...",
+        "platform": "twitter",
+        "publishedAt": "2024-01-15T10:30:00Z",
+        "engagement": {
+            "likes": 87,
+            "shares": 23,
+            "comments": 12,
+            "impressions": 1200,
+            "score": 95
+        }
+    },
+)
+
+MOCK_RECOMMENDATIONS = (
+    {
+        "type": "posting_time",
+        "title": "Optimal posting time",
+        "description": "Your audience is most active on Tuesdays at 10:30 AM. Consider scheduling more content at this time.",
+        "confidence": 0.85,
+        "action": "schedule_posts"
+    },
+    {
+        "type": "content_theme",
+        "title": "Content theme opportunity",
+        "description": "\"Industry insights\" posts perform 23% better. Try creating more content around this theme.",
+        "confidence": 0.78,
+        "action": "generate_content"
+    },
+    {
+        "type": "improvement",
+        "title": "Great improvement",
+        "description": "Your approval rate increased by 12% this week. Keep up the excellent work!",
+        "confidence": 1.0,
+        "action": None
+    }
+)
+
+# Recommendations are static, so the response body and its ETag are
+# serialized once; clients revalidate with If-None-Match
+RECOMMENDATIONS_MAX_AGE = 300
+RECOMMENDATIONS_BODY = orjson.dumps({"success": True, "data": MOCK_RECOMMENDATIONS})
+RECOMMENDATIONS_ETAG = '"%s"' % hashlib.md5(RECOMMENDATIONS_BODY).hexdigest()
+RECOMMENDATIONS_HEADERS = {
+    "ETag": RECOMMENDATIONS_ETAG,
+    "Cache-Control": f"private, max-age={RECOMMENDATIONS_MAX_AGE}"
+}
+
+@lru_cache(maxsize=128)
+def _mock_engagement_trends(start_date: date, days: int) -> tuple:
+    """Build the mock trend series; deterministic per (start_date, days)"""
+    i = np.arange(days)
+    dates = np.datetime_as_string(np.datetime64(start_date) + i, unit="D")
+    impressions = 1000 + i * 50 + (i % 7) * 200
+    engagement = 60 + (i % 10) * 8
+    posts = (i % 3 == 0).astype(int)
+    
+    return tuple(
+        {"date": d, "impressions": imp, "engagement": eng, "posts": p}
+        for d, imp, eng, p in zip(dates.tolist(), impressions.tolist(), engagement.tolist(), posts.tolist())
+    )
+
+@lru_cache(maxsize=128)
+def _mock_engagement_trends_body(start_date: date, days: int) -> bytes:
+    """Serialized mock trends response"""
+    return orjson.dumps({"success": True, "data": _mock_engagement_trends(start_date, days)})
+
+def _trends_start_date(days: int) -> date:
+    return (datetime.utcnow() - timedelta(days=days)).date()
+
+def build_engagement_trends(days: int) -> tuple:
+    """Engagement trend series for the last `days` days (mock data)"""
+    return _mock_engagement_trends(_trends_start_date(days), days)
+
+async def build_analytics(db: AsyncSession, user_id: int, range: str) -> dict:
+    """Analytics summary for a user over week/month/quarter, cached in Redis"""
+    cache_key = f"analytics:{user_id}:{range}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Calculate date range: days up to the user's latest rollup come from the
+    # rollup table, anything newer (today, or days the nightly job hasn't
+    # reached yet) is counted live from the raw tables
+    today = datetime.utcnow().date()
+    start_date = today - timedelta(days=ANALYTICS_RANGE_DAYS[range])
+    
+    last_rollup_date = (await db.execute(
+        select(func.max(DailyUserRollup.date)).where(DailyUserRollup.user_id == user_id)
+    )).scalar()
+    live_from = start_date
+    if last_rollup_date is not None:
+        live_from = max(start_date, last_rollup_date + timedelta(days=1))
+    live_start = datetime.combine(live_from, time.min)
+    
+    rollup_counts = select(
+        DailyUserRollup.drafts_generated,
+        DailyUserRollup.drafts_approved,
+        DailyUserRollup.posts_published
+    ).where(
+        DailyUserRollup.user_id == user_id,
+        DailyUserRollup.date >= start_date,
+        DailyUserRollup.date < live_from
+    )
+    
+    live_posts_subquery = select(func.count(Post.id))\
+        .where(
+            Post.user_id == user_id,
+            Post.published_at >= live_start
+        ).scalar_subquery()
+    
+    live_counts = select(
+        func.count(Draft.id),
+        func.count(Draft.id).filter(Draft.status == "approved"),
+        live_posts_subquery
+    ).where(
+        Draft.user_id == user_id,
+        Draft.created_at >= live_start
+    )
+    
+    window = union_all(rollup_counts, live_counts).subquery()
+    counts = (await db.execute(
+        select(
+            func.coalesce(func.sum(window.c.drafts_generated), 0).label("drafts_generated"),
+            func.coalesce(func.sum(window.c.drafts_approved), 0).label("drafts_approved"),
+            func.coalesce(func.sum(window.c.posts_published), 0).label("posts_published")
+        )
+    )).one()
+    
+    drafts_generated = counts.drafts_generated
+    drafts_approved = counts.drafts_approved
+    posts_published = counts.posts_published
+    
+    # Calculate approval rate
+    approval_rate = (drafts_approved / drafts_generated * 100) if drafts_generated > 0 else 0
+    
+    # Mock data for engagement and time saved
+    engagement_growth = 12.5  # Would calculate from actual metrics
+    time_saved = drafts_generated * 15  # Estimate 15 minutes per draft
+    
+    data = {
+        "userId": user_id,
+        "timeRange": range,
+        "draftsGenerated": drafts_generated,
+        "draftsApproved": drafts_approved,
+        "postsPublished": posts_published,
+        "engagementGrowth": engagement_growth,
+        "timeSaved": time_saved,
+        "approvalRate": round(approval_rate, 1),
+        "topThemes": MOCK_TOP_THEMES,
+        "bestPerformingContent": MOCK_BEST_PERFORMING_CONTENT
+    }
+    
+    await cache_set(cache_key, data, ANALYTICS_CACHE_TTL[range])
+    return data
+
 @router.get("")
 async def get_analytics(
     range: str = Query("week", regex="^(week|month|quarter)$"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user analytics data"""
-    try:
-        # Calculate date range
-        now = datetime.utcnow()
-        if range == "week":
-            start_date = now - timedelta(days=7)
-        elif range == "month":
-            start_date = now - timedelta(days=30)
-        else:  # quarter
-            start_date = now - timedelta(days=90)
-        
-        # Get draft counts
-        drafts_generated = db.query(func.count(Draft.id))\
-            .filter(
-                Draft.user_id == current_user.id,
-                Draft.created_at >= start_date
-            ).scalar() or 0
-        
-        drafts_approved = db.query(func.count(Draft.id))\
-            .filter(
-                Draft.user_id == current_user.id,
-                Draft.status == "approved",
-                Draft.created_at >= start_date
-            ).scalar() or 0
-        
-        posts_published = db.query(func.count(Post.id))\
-            .filter(
-                Post.user_id == current_user.id,
-                Post.published_at >= start_date
-            ).scalar() or 0
-        
-        # Calculate approval rate
-        approval_rate = (drafts_approved / drafts_generated * 100) if drafts_generated > 0 else 0
-        
-        # Mock data for engagement and time saved
-        engagement_growth = 12.5  # Would calculate from actual metrics
-        time_saved = drafts_generated * 15  # Estimate 15 minutes per draft
-        
-        # Get top themes (mock data)
-        top_themes = [
-            {"theme": "AI Strategy", "posts": 8, "engagement": 156},
-            {"theme": "Content Marketing", "posts": 6, "engagement": 142},
-            {"theme": "Industry Insights", "posts": 4, "engagement": 98}
-        ]
-        
-        # Get best performing content (mock data)
-        best_performing_content = [
-            {
-                "id": 1,
-                "content": "5 AI trends that will shape 2024...",
-                "platform": "twitter",
-                "publishedAt": "2024-01-15T10:30:00Z",
-                "engagement": {
-                    "likes": 87,
-                    "shares": 23,
-                    "comments": 12,
-                    "impressions": 1200,
-                    "score": 95
-                }
-            }
-        ]
-        
-        return {
-            "success": True,
-            "data": {
-                "userId": current_user.id,
-                "timeRange": range,
-                "draftsGenerated": drafts_generated,
-                "draftsApproved": drafts_approved,
-                "postsPublished": posts_published,
-                "engagementGrowth": engagement_growth,
-                "timeSaved": time_saved,
-                "approvalRate": round(approval_rate, 1),
-                "topThemes": top_themes,
-                "bestPerformingContent": best_performing_content
-            }
-        }
-        
-    except Exception as e:
-        print(f"Error fetching analytics: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch analytics"
-        )
+    return {
+        "success": True,
+        "data": await build_analytics(db, current_user.id, range)
+    }
 
 @router.get("/engagement-trends")
 async def get_engagement_trends(
     days: int = Query(30, le=90),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get engagement trends over time"""
-    try:
-        # Mock engagement trend data
-        trends = []
-        base_date = datetime.utcnow() - timedelta(days=days)
-        
-        for i in range(days):
-            date = base_date + timedelta(days=i)
-            trends.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "impressions": 1000 + (i * 50) + (i % 7 * 200),
-                "engagement": 60 + (i % 10 * 8),
-                "posts": 1 if i % 3 == 0 else 0
-            })
-        
-        return {
-            "success": True,
-            "data": trends
-        }
-        
-    except Exception as e:
-        print(f"Error fetching engagement trends: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch engagement trends"
-        )
+    # Mock engagement trend data
+    return Response(
+        content=_mock_engagement_trends_body(_trends_start_date(days), days),
+        media_type="application/json"
+    )
 
 @router.get("/recommendations")
 async def get_ai_recommendations(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get AI-powered recommendations"""
-    try:
-        # Mock AI recommendations
-        recommendations = [
-            {
-                "type": "posting_time",
-                "title": "Optimal posting time",
-                "description": "Your audience is most active on Tuesdays at 10:30 AM. Consider scheduling more content at this time.",
-                "confidence": 0.85,
-                "action": "schedule_posts"
-            },
-            {
-                "type": "content_theme",
-                "title": "Content theme opportunity", 
-                "description": "\"Industry insights\" posts perform 23% better. Try creating more content around this theme.",
-                "confidence": 0.78,
-                "action": "generate_content"
-            },
-            {
-                "type": "improvement",
-                "title": "Great improvement",
-                "description": "Your approval rate increased by 12% this week. Keep up the excellent work!",
-                "confidence": 1.0,
-                "action": None
-            }
-        ]
-        
-        return {
-            "success": True,
-            "data": recommendations
-        }
-        
-    except Exception as e:
-        print(f"Error fetching recommendations: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch recommendations"
-        )
\ No newline at end of file
+    if_none_match = request.headers.get("if-none-match", "")
+    if RECOMMENDATIONS_ETAG in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=RECOMMENDATIONS_HEADERS)
+    
+    return Response(
+        content=RECOMMENDATIONS_BODY,
+        media_type="application/json",
+        headers=RECOMMENDATIONS_HEADERS
+    )
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.models.user import User
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, invalidate_user_cache
 
 router = APIRouter()
 
@@ -19,7 +19,7 @@ class AuthResponse(BaseModel):
 @router.post("/verify", response_model=AuthResponse)
 async def verify_firebase_token(
     request: FirebaseTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify Firebase token and return API token"""
     try:
@@ -69,4 +69,14 @@ async def refresh_token(current_user: User = Depends(get_current_user)):
             "token": f"refreshed_token_{current_user.id}",
             "expires_in": 3600
         }
-    }
\ No newline at end of file
+    }
+
+@router.post("/logout")
+async def logout(current_user: User = Depends(get_current_user)):
+    """Log out: drop the cached user resolution for every token of this user"""
+    await invalidate_user_cache(current_user.id)
+    
+    return {
+        "success": True,
+        "message": "Logged out"
+    }
@@ -1,16 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select
 from pydantic import BaseModel
-from typing import List, Optional
+from redis.exceptions import RedisError
+from typing import AsyncIterator, List, Optional
+from datetime import datetime
+import asyncio
+import logging
 
-from app.core.database import get_db
+import orjson
+
+from app.core.cache import redis_client
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.models.chat import ChatMessage
 from app.services.ai_service import ai_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# User profile context for chat (mock)
+MOCK_CHAT_PROFILE = {
+    "goals": ["grow audience", "thought leadership"],
+    "themes": ["AI", "content marketing", "strategy"]
+}
+
+# Seconds a queued reply stays readable, how long a stream waits for it, and
+# the keep-alive interval while waiting
+CHAT_STREAM_TTL = 300
+CHAT_STREAM_TIMEOUT = 120
+CHAT_STREAM_KEEPALIVE = 15
+# Seconds between checks for new events while a stream waits
+CHAT_STREAM_POLL_INTERVAL = 0.1
+# Reply tokens after the first are coalesced into "delta" events per window (seconds)
+CHAT_DELTA_WINDOW = 0.05
+
+# Background chat completions started by /message/async
+_background_tasks = set()
+
 class ChatMessageRequest(BaseModel):
     message: str
 
@@ -19,144 +49,297 @@ class ChatMessageResponse(BaseModel):
     role: str
     content: str
     actions: Optional[List[dict]] = None
-    timestamp: str
+    timestamp: datetime
     
     class Config:
         from_attributes = True
 
-@router.post("/message")
-async def send_chat_message(
-    request: ChatMessageRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Send a message to the AI assistant"""
+def _chat_stream_key(message_id: int) -> str:
+    return f"chat:stream:{message_id}"
+
+async def _get_chat_context(db: AsyncSession, user_id: int, message: str) -> List[dict]:
+    """Build the AI message list: the 9 most recent messages, oldest first, plus the new one"""
+    recent_messages = select(ChatMessage.id, ChatMessage.role, ChatMessage.content)\
+        .where(ChatMessage.user_id == user_id)\
+        .order_by(ChatMessage.id.desc())\
+        .limit(9)\
+        .subquery()
+    result = await db.execute(
+        select(recent_messages.c.role, recent_messages.c.content)
+        .order_by(recent_messages.c.id)
+    )
+    
+    messages = [{"role": row.role, "content": row.content} for row in result]
+    messages.append({"role": "user", "content": message})
+    return messages
+
+def _assistant_message_data(message: ChatMessage) -> dict:
+    return {
+        "id": message.id,
+        "role": message.role,
+        "content": message.content,
+        "actions": message.actions,
+        "timestamp": message.created_at
+    }
+
+async def _publish_chat_event(message_id: int, event: str, data: dict) -> None:
+    """Append an SSE event for /stream/{message_id} to a Redis list
+
+    Events are read, not popped, so every subscriber (late, reconnecting or in
+    another tab) sees all of them until the list expires
+    """
+    key = _chat_stream_key(message_id)
     try:
-        # Save user message
-        user_message = ChatMessage(
-            user_id=current_user.id,
-            role="user",
-            content=request.message
-        )
-        db.add(user_message)
-        db.commit()
-        db.refresh(user_message)
+        await redis_client.rpush(key, orjson.dumps({"event": event, "data": data}))
+        await redis_client.expire(key, CHAT_STREAM_TTL)
+    except RedisError as e:
+        logger.warning("Failed to publish chat event for message %s: %s", message_id, e)
+
+async def _complete_chat_in_background(user_id: int, message_id: int, messages: List[dict]) -> None:
+    """Generate and persist the assistant reply, publishing it to the message's stream
+
+    Partial text is published as "delta" events while the reply is generated,
+    then the saved reply as a "message" event
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        ai_response = None
+        pending = []
+        last_flush = None
         
-        # Get recent chat history for context
-        recent_messages = db.query(ChatMessage)\
-            .filter(ChatMessage.user_id == current_user.id)\
-            .order_by(ChatMessage.created_at.desc())\
-            .limit(10)\
-            .all()
+        async for event in ai_service.stream_chat_completion(
+            messages=messages,
+            user_profile=MOCK_CHAT_PROFILE,
+            user_id=user_id
+        ):
+            if "delta" not in event:
+                ai_response = event
+                continue
+            
+            pending.append(event["delta"])
+            # The first tokens go out immediately; later ones are batched
+            if last_flush is None or loop.time() - last_flush >= CHAT_DELTA_WINDOW:
+                await _publish_chat_event(message_id, "delta", {"content": "".join(pending)})
+                pending.clear()
+                last_flush = loop.time()
         
-        # Format messages for AI
-        messages = []
-        for msg in reversed(recent_messages[:-1]):  # Exclude the just-added message
-            messages.append({
-                "role": msg.role,
-                "content": msg.content
-            })
-        messages.append({"role": "user", "content": request.message})
+        if pending:
+            await _publish_chat_event(message_id, "delta", {"content": "".join(pending)})
         
-        # Get user profile for context (mock)
-        user_profile = {
-            "goals": ["grow audience", "thought leadership"],
-            "themes": ["AI", "content marketing", "strategy"]
-        }
+        async with AsyncSessionLocal() as db:
+            assistant_message = ChatMessage(
+                user_id=user_id,
+                role="assistant",
+                content=ai_response["content"],
+                actions=ai_response.get("actions", [])
+            )
+            db.add(assistant_message)
+            await db.commit()
+            await db.refresh(assistant_message)
         
-        # Generate AI response
-        ai_response = await ai_service.chat_completion(
-            messages=messages,
-            user_profile=user_profile
-        )
+        await _publish_chat_event(message_id, "message", _assistant_message_data(assistant_message))
+    except Exception:
+        logger.exception("Background chat completion failed for message %s", message_id)
+        await _publish_chat_event(message_id, "error", {"detail": "Failed to process message"})
+    finally:
+        await _publish_chat_event(message_id, "done", {})
+
+async def _chat_event_stream(message_id: int, cursor: int = 0) -> AsyncIterator[str]:
+    """Forward queued chat events as SSE, from index `cursor` on, until the reply is done or the stream times out
+
+    Each event's id is its list index, so a reconnecting client resumes from Last-Event-ID
+    """
+    key = _chat_stream_key(message_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CHAT_STREAM_TIMEOUT
+    next_keepalive = loop.time() + CHAT_STREAM_KEEPALIVE
+    
+    while True:
+        if loop.time() >= deadline:
+            yield 'event: error\ndata: {"detail":"Timed out waiting for reply"}\n\n'
+            return
         
-        # Save AI response
-        assistant_message = ChatMessage(
-            user_id=current_user.id,
-            role="assistant",
-            content=ai_response["content"],
-            actions=ai_response.get("actions", [])
-        )
-        db.add(assistant_message)
-        db.commit()
-        db.refresh(assistant_message)
+        try:
+            items = await redis_client.lrange(key, cursor, -1)
+        except RedisError:
+            yield 'event: error\ndata: {"detail":"Stream unavailable"}\n\n'
+            return
         
-        return {
-            "success": True,
-            "data": {
-                "id": assistant_message.id,
-                "role": assistant_message.role,
-                "content": assistant_message.content,
-                "actions": assistant_message.actions,
-                "timestamp": assistant_message.created_at.isoformat()
-            }
-        }
+        if not items:
+            if loop.time() >= next_keepalive:
+                yield ": keep-alive\n\n"
+                next_keepalive = loop.time() + CHAT_STREAM_KEEPALIVE
+            await asyncio.sleep(CHAT_STREAM_POLL_INTERVAL)
+            continue
         
-    except Exception as e:
-        print(f"Error in chat: {e}")
+        for item in items:
+            event = orjson.loads(item)
+            yield f"id: {cursor}\nevent: {event['event']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+            cursor += 1
+            if event["event"] == "done":
+                return
+        next_keepalive = loop.time() + CHAT_STREAM_KEEPALIVE
+
+@router.post("/message")
+async def send_chat_message(
+    request: ChatMessageRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Send a message to the AI assistant"""
+    messages = await _get_chat_context(db, current_user.id, request.message)
+    
+    # Commit the user message before the AI call, so it is kept even if the
+    # call fails and no connection is held while waiting on the reply
+    user_message = ChatMessage(
+        user_id=current_user.id,
+        role="user",
+        content=request.message
+    )
+    db.add(user_message)
+    await db.commit()
+    
+    # Generate AI response
+    ai_response = await ai_service.chat_completion(
+        messages=messages,
+        user_profile=MOCK_CHAT_PROFILE,
+        user_id=current_user.id
+    )
+    
+    assistant_message = ChatMessage(
+        user_id=current_user.id,
+        role="assistant",
+        content=ai_response["content"],
+        actions=ai_response.get("actions", [])
+    )
+    db.add(assistant_message)
+    await db.commit()
+    await db.refresh(assistant_message)
+    
+    return {
+        "success": True,
+        "data": _assistant_message_data(assistant_message)
+    }
+
+@router.post("/message/async", status_code=status.HTTP_202_ACCEPTED)
+async def send_chat_message_async(
+    request: ChatMessageRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Send a message and stream the AI reply from /stream/{message_id}"""
+    messages = await _get_chat_context(db, current_user.id, request.message)
+    
+    user_message = ChatMessage(
+        user_id=current_user.id,
+        role="user",
+        content=request.message
+    )
+    db.add(user_message)
+    await db.commit()
+    
+    # Keep a reference so the task isn't garbage collected mid-flight
+    task = asyncio.create_task(
+        _complete_chat_in_background(current_user.id, user_message.id, messages)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    
+    return {
+        "success": True,
+        "data": {
+            "message_id": user_message.id,
+            "stream_url": f"/v1/chat/stream/{user_message.id}"
+        }
+    }
+
+@router.get("/stream/{message_id}")
+async def stream_chat_reply(
+    message_id: int,
+    last_event_id: Optional[int] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream the AI reply to a message sent with /message/async as Server-Sent Events"""
+    result = await db.execute(
+        select(ChatMessage.id).where(
+            ChatMessage.id == message_id,
+            ChatMessage.user_id == current_user.id,
+            ChatMessage.role == "user"
+        )
+    )
+    if result.scalar() is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to process message"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
         )
+    
+    # Release the DB connection before holding the stream open
+    await db.close()
+    
+    return StreamingResponse(
+        _chat_event_stream(message_id, 0 if last_event_id is None else last_event_id + 1),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/history")
 async def get_chat_history(
     limit: int = Query(50, le=100),
+    before_id: Optional[int] = Query(None, description="Return messages older than this message id"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get chat message history"""
-    try:
-        messages = db.query(ChatMessage)\
-            .filter(ChatMessage.user_id == current_user.id)\
-            .order_by(ChatMessage.created_at.desc())\
-            .limit(limit)\
-            .all()
-        
-        # Reverse to get chronological order
-        messages.reverse()
-        
-        return {
-            "success": True,
-            "data": [
-                {
-                    "id": msg.id,
-                    "role": msg.role,
-                    "content": msg.content,
-                    "actions": msg.actions,
-                    "timestamp": msg.created_at.isoformat()
-                }
-                for msg in messages
-            ]
-        }
-        
-    except Exception as e:
-        print(f"Error fetching chat history: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch chat history"
-        )
+    """Get chat message history, paging backwards with before_id"""
+    # Keyset pagination: newest `limit` messages below before_id, selecting
+    # only the serialized columns
+    page = select(
+        ChatMessage.id,
+        ChatMessage.role,
+        ChatMessage.content,
+        ChatMessage.actions,
+        ChatMessage.created_at
+    ).where(ChatMessage.user_id == current_user.id)
+    
+    if before_id is not None:
+        page = page.where(ChatMessage.id < before_id)
+    
+    page = page.order_by(ChatMessage.id.desc()).limit(limit).subquery()
+    
+    # Re-sort the page into chronological order in SQL
+    result = await db.execute(select(page).order_by(page.c.id))
+    messages = result.all()
+    
+    return {
+        "success": True,
+        "data": [
+            {
+                "id": msg.id,
+                "role": msg.role,
+                "content": msg.content,
+                "actions": msg.actions,
+                "timestamp": msg.created_at
+            }
+            for msg in messages
+        ]
+    }
 
 @router.delete("/history")
 async def clear_chat_history(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Clear chat message history"""
-    try:
-        db.query(ChatMessage)\
-            .filter(ChatMessage.user_id == current_user.id)\
-            .delete()
-        db.commit()
-        
-        return {
-            "success": True,
-            "message": "Chat history cleared"
-        }
-        
-    except Exception as e:
-        print(f"Error clearing chat history: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to clear chat history"
-        )
\ No newline at end of file
+    # Single DELETE round-trip; nothing is loaded into the session
+    result = await db.execute(
+        delete(ChatMessage)
+        .where(ChatMessage.user_id == current_user.id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    
+    return {
+        "success": True,
+        "message": "Chat history cleared",
+        "deleted": result.rowcount
+    }
\ No newline at end of file
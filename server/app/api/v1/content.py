@@ -1,10 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from celery.result import AsyncResult
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import raiseload
+from typing import Any, AsyncIterator, Callable, List, Optional
+from datetime import datetime, timedelta
+from pydantic import BaseModel, TypeAdapter
+import orjson
 
-from app.core.database import get_db
+from app.core.cache import cache_delete_pattern, cache_get, cache_set, user_content_cache_patterns
+from app.core.celery_app import celery_app
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.models.content import Draft
@@ -16,7 +24,9 @@ from app.schemas.content import (
     FeedbackCreate
 )
 from app.services.ai_service import ai_service
-from app.services.scheduler_service import content_scheduler, content_publisher, engagement_tracker
+from app.services.analytics_service import rollup_approvals_update
+from app.services.generation_service import MOCK_GENERATION_PROFILE, draft_rows, generate_content_task
+from app.services.scheduler_service import content_scheduler, content_publisher, engagement_tracker, scheduled_content_entry
 
 class ScheduleContentRequest(BaseModel):
     scheduled_time: Optional[datetime] = None
@@ -25,210 +35,286 @@ class ScheduleContentRequest(BaseModel):
 class RescheduleContentRequest(BaseModel):
     new_time: datetime
 
+class BatchScheduleItem(ScheduleContentRequest):
+    draft_id: int
+
+class BatchScheduleRequest(BaseModel):
+    items: List[BatchScheduleItem]
+
+class BatchRescheduleItem(RescheduleContentRequest):
+    draft_id: int
+
+class BatchRescheduleRequest(BaseModel):
+    items: List[BatchRescheduleItem]
+
+class BatchCancelRequest(BaseModel):
+    draft_ids: List[int]
+
 router = APIRouter()
 
+# Only the columns DraftResponse serializes, so listings skip prompt_used etc.
+DRAFT_RESPONSE_COLUMNS = [getattr(Draft, field) for field in DraftResponse.model_fields]
+
+# Validates a whole list of drafts in one call into pydantic-core
+DRAFT_LIST_ADAPTER = TypeAdapter(List[DraftResponse])
+
+# Per-user read cache TTLs (seconds); mutation endpoints invalidate them
+DRAFTS_CACHE_TTL = 60
+SCHEDULED_CACHE_TTL = 60
+POST_PERFORMANCE_CACHE_TTL = 60
+INSIGHTS_CACHE_TTL = 120
+
+# Rows fetched per round trip when streaming NDJSON listings
+NDJSON_STREAM_BATCH = 100
+
+async def invalidate_content_caches(user_id: int) -> None:
+    """Drop a user's cached drafts, scheduled content and analytics"""
+    for pattern in user_content_cache_patterns(user_id):
+        await cache_delete_pattern(pattern)
+
+async def _ndjson_rows(query, serialize: Callable[[Any], Any]) -> AsyncIterator[bytes]:
+    """Stream query rows as NDJSON lines, NDJSON_STREAM_BATCH rows at a time"""
+    # The response body outlives the request's dependencies, so the
+    # generator owns its session
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=NDJSON_STREAM_BATCH))
+        async for row in result:
+            yield orjson.dumps(serialize(row)) + b"\n"
+
+def _ndjson_response(query, serialize: Callable[[Any], Any]) -> StreamingResponse:
+    return StreamingResponse(_ndjson_rows(query, serialize), media_type="application/x-ndjson")
+
 @router.post("/generate")
 async def generate_drafts(
     request: GenerateDraftsRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate content drafts using AI"""
-    try:
-        # Get user profile for context (mock for now)
-        user_profile = {
-            "goals": ["grow audience", "thought leadership"],
-            "themes": ["AI", "content marketing", "strategy"],
-            "voice_profile": {
-                "tone": {"formal": 40, "punchy": 70, "contrarian": 30}
-            }
-        }
-        
-        # Generate drafts using AI service
-        drafts_data = await ai_service.generate_content_drafts(
-            user_profile=user_profile,
-            prompt=request.prompt,
-            count=request.count,
-            platform=request.platform
+    # Generate drafts using AI service
+    drafts_data = await ai_service.generate_content_drafts(
+        user_profile=MOCK_GENERATION_PROFILE,
+        prompt=request.prompt,
+        count=request.count,
+        platform=request.platform
+    )
+    
+    # Save drafts with a single multi-row INSERT ... RETURNING, which also
+    # hands back server-generated columns without a reload
+    rows = draft_rows(current_user.id, request.prompt, drafts_data)
+    created_drafts = []
+    if rows:
+        result = await db.execute(
+            insert(Draft).values(rows).returning(*DRAFT_RESPONSE_COLUMNS)
         )
-        
-        # Save drafts to database
-        created_drafts = []
-        for draft_data in drafts_data:
-            draft = Draft(
-                user_id=current_user.id,
-                content=draft_data["content"],
-                platform=draft_data["platform"],
-                variants=draft_data.get("variants"),
-                best_time_score=draft_data.get("best_time_score"),
-                moderation_status=draft_data.get("moderation_status", "approved"),
-                themes=draft_data.get("themes"),
-                prompt_used=request.prompt
-            )
-            db.add(draft)
-            created_drafts.append(draft)
-        
-        db.commit()
-        
-        # Refresh drafts to get IDs
-        for draft in created_drafts:
-            db.refresh(draft)
-        
-        return {
-            "success": True,
-            "data": [
-                DraftResponse.model_validate(draft) for draft in created_drafts
-            ]
+        # RETURNING order isn't guaranteed; ids follow insertion order
+        created_drafts = sorted(result.all(), key=lambda draft: draft.id)
+        await db.commit()
+    
+    await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": DRAFT_LIST_ADAPTER.validate_python(created_drafts, from_attributes=True)
+    }
+
+@router.post("/generate/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def generate_drafts_job(
+    request: GenerateDraftsRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Queue AI draft generation; poll /jobs/{job_id} for the result"""
+    # Publishing to the broker is blocking I/O, so keep it off the event loop
+    job = await run_in_threadpool(
+        generate_content_task.apply_async,
+        kwargs={
+            "user_id": current_user.id,
+            "prompt": request.prompt,
+            "count": request.count,
+            "platform": request.platform
+        },
+        retry=False
+    )
+    
+    return {
+        "success": True,
+        "data": {
+            "job_id": job.id,
+            "status_url": f"/v1/content/jobs/{job.id}"
         }
-        
-    except Exception as e:
-        print(f"Error generating drafts: {e}")
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a draft generation job"""
+    job = AsyncResult(job_id, app=celery_app)
+    state = await run_in_threadpool(lambda: job.state)
+    data = {"job_id": job_id, "status": state}
+    
+    if state == "SUCCESS":
+        result = await run_in_threadpool(lambda: job.result)
+        if result.get("user_id") != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        data["draft_ids"] = result["draft_ids"]
+    elif state == "FAILURE":
+        data["error"] = "Draft generation failed"
+    
+    return {
+        "success": True,
+        "data": data
+    }
+
+async def _get_user_draft(db: AsyncSession, draft_id: int, user_id: int) -> Draft:
+    """Load one of the user's drafts or raise 404"""
+    # DraftResponse only reads columns; raiseload makes any accidental
+    # relationship access fail loudly instead of issuing a lazy query
+    result = await db.execute(
+        select(Draft)
+        .options(raiseload("*"))
+        .where(
+            Draft.id == draft_id,
+            Draft.user_id == user_id
+        )
+    )
+    draft = result.scalars().first()
+    
+    if not draft:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Draft not found"
+        )
+    
+    return draft
+
+async def _update_user_draft(db: AsyncSession, draft_id: int, user_id: int, values: dict) -> DraftResponse:
+    """Update a user's draft with UPDATE ... RETURNING and commit, or raise 404"""
+    result = await db.execute(
+        update(Draft)
+        .where(Draft.id == draft_id, Draft.user_id == user_id)
+        .values(**values)
+        .returning(*DRAFT_RESPONSE_COLUMNS)
+    )
+    row = result.one_or_none()
+    if not row:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate drafts"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Draft not found"
         )
+    
+    # Status changes move the approved count of an already rolled-up day
+    if "status" in values:
+        await db.execute(rollup_approvals_update(user_id, row.created_at))
+    
+    await db.commit()
+    return DraftResponse.model_validate(row)
+
+async def list_drafts(
+    db: AsyncSession,
+    user_id: int,
+    status_filter: Optional[str] = None
+) -> List[DraftResponse]:
+    """A user's drafts, newest first, optionally filtered by status (cached)"""
+    cache_key = f"drafts:{user_id}:{status_filter or 'all'}"
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    query = select(*DRAFT_RESPONSE_COLUMNS).where(Draft.user_id == user_id)
+    
+    if status_filter:
+        query = query.where(Draft.status == status_filter)
+    
+    result = await db.execute(query.order_by(Draft.created_at.desc()))
+    drafts = DRAFT_LIST_ADAPTER.validate_python(result.all(), from_attributes=True)
+    
+    await cache_set(cache_key, drafts, DRAFTS_CACHE_TTL)
+    return drafts
 
 @router.get("/drafts")
 async def get_drafts(
     status_filter: Optional[str] = Query(None, alias="status"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user's drafts with optional status filter"""
-    try:
-        query = db.query(Draft).filter(Draft.user_id == current_user.id)
-        
-        if status_filter:
-            query = query.filter(Draft.status == status_filter)
-        
-        drafts = query.order_by(Draft.created_at.desc()).all()
-        
-        return {
-            "success": True,
-            "data": [DraftResponse.model_validate(draft) for draft in drafts]
-        }
-        
-    except Exception as e:
-        print(f"Error fetching drafts: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch drafts"
-        )
+    return {
+        "success": True,
+        "data": await list_drafts(db, current_user.id, status_filter)
+    }
+
+@router.get("/drafts/stream")
+async def stream_drafts(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream user's drafts as NDJSON, one draft per line"""
+    query = select(*DRAFT_RESPONSE_COLUMNS).where(Draft.user_id == current_user.id)
+    
+    if status_filter:
+        query = query.where(Draft.status == status_filter)
+    
+    return _ndjson_response(
+        query.order_by(Draft.created_at.desc()),
+        lambda row: DraftResponse.model_validate(row).model_dump()
+    )
 
 @router.post("/drafts/{draft_id}/approve")
 async def approve_draft(
     draft_id: int,
     request: ApproveDraftRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Approve a draft and optionally schedule it"""
-    try:
-        draft = db.query(Draft).filter(
-            Draft.id == draft_id,
-            Draft.user_id == current_user.id
-        ).first()
-        
-        if not draft:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Draft not found"
-            )
-        
-        # Update draft status
-        if request.schedule_time:
-            draft.status = "scheduled"
-            draft.scheduled_for = request.schedule_time
-        else:
-            draft.status = "approved"
-        
-        db.commit()
-        db.refresh(draft)
-        
-        return {
-            "success": True,
-            "data": DraftResponse.model_validate(draft)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error approving draft: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to approve draft"
-        )
+    # Update draft status
+    if request.schedule_time:
+        values = {"status": "scheduled", "scheduled_for": request.schedule_time}
+    else:
+        values = {"status": "approved"}
+    
+    draft = await _update_user_draft(db, draft_id, current_user.id, values)
+    await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": draft
+    }
 
 @router.post("/drafts/{draft_id}/reject")
 async def reject_draft(
     draft_id: int,
     request: RejectDraftRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Reject a draft"""
-    try:
-        draft = db.query(Draft).filter(
-            Draft.id == draft_id,
-            Draft.user_id == current_user.id
-        ).first()
-        
-        if not draft:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Draft not found"
-            )
-        
-        draft.status = "rejected"
-        db.commit()
-        db.refresh(draft)
-        
-        return {
-            "success": True,
-            "data": DraftResponse.model_validate(draft)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error rejecting draft: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to reject draft"
-        )
+    draft = await _update_user_draft(db, draft_id, current_user.id, {"status": "rejected"})
+    await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": draft
+    }
 
 @router.get("/drafts/{draft_id}")
 async def get_draft(
     draft_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get specific draft details"""
-    try:
-        draft = db.query(Draft).filter(
-            Draft.id == draft_id,
-            Draft.user_id == current_user.id
-        ).first()
-        
-        if not draft:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Draft not found"
-            )
-        
-        return {
-            "success": True,
-            "data": DraftResponse.model_validate(draft)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error fetching draft: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch draft"
-        )
+    draft = await _get_user_draft(db, draft_id, current_user.id)
+    
+    return {
+        "success": True,
+        "data": DraftResponse.model_validate(draft)
+    }
 
 # Enhanced Scheduling Endpoints
 @router.post("/drafts/{draft_id}/schedule")
@@ -238,33 +324,52 @@ async def schedule_content(
     current_user: User = Depends(get_current_user)
 ):
     """Schedule content for publishing with intelligent timing"""
-    try:
-        result = await content_scheduler.schedule_content(
-            draft_id=draft_id,
-            user_id=current_user.id,
-            scheduled_time=request.scheduled_time,
-            auto_optimize=request.auto_optimize
+    result = await content_scheduler.schedule_content(
+        draft_id=draft_id,
+        user_id=current_user.id,
+        scheduled_time=request.scheduled_time,
+        auto_optimize=request.auto_optimize
+    )
+    
+    if "error" in result:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
         )
-        
-        if "error" in result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result["error"]
-            )
-        
-        return {
-            "success": True,
-            "data": result
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error scheduling content: {e}")
+    
+    await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": result
+    }
+
+@router.post("/drafts/schedule:batch")
+async def schedule_content_batch(
+    request: BatchScheduleRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Schedule several drafts in one request; per-draft errors are reported in results"""
+    result = await content_scheduler.schedule_content_batch(
+        db,
+        user_id=current_user.id,
+        items=[item.model_dump() for item in request.items]
+    )
+    
+    if "error" in result:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to schedule content"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
         )
+    
+    if result["scheduled"]:
+        await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": result
+    }
 
 @router.delete("/drafts/{draft_id}/schedule")
 async def cancel_scheduled_content(
@@ -272,25 +377,17 @@ async def cancel_scheduled_content(
     current_user: User = Depends(get_current_user)
 ):
     """Cancel scheduled content"""
-    try:
-        result = await content_scheduler.cancel_scheduled_content(draft_id, current_user.id)
-        
-        if "error" in result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result["error"]
-            )
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error canceling scheduled content: {e}")
+    result = await content_scheduler.cancel_scheduled_content(draft_id, current_user.id)
+    
+    if "error" in result:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to cancel scheduled content"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
         )
+    
+    await invalidate_content_caches(current_user.id)
+    
+    return result
 
 @router.put("/drafts/{draft_id}/reschedule")
 async def reschedule_content(
@@ -299,30 +396,75 @@ async def reschedule_content(
     current_user: User = Depends(get_current_user)
 ):
     """Reschedule existing scheduled content"""
-    try:
-        result = await content_scheduler.reschedule_content(
-            draft_id, current_user.id, request.new_time
+    result = await content_scheduler.reschedule_content(
+        draft_id, current_user.id, request.new_time
+    )
+    
+    if "error" in result:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
         )
-        
-        if "error" in result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result["error"]
-            )
-        
-        return {
-            "success": True,
-            "data": result
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error rescheduling content: {e}")
+    
+    await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": result
+    }
+
+@router.post("/drafts/reschedule:batch")
+async def reschedule_content_batch(
+    request: BatchRescheduleRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reschedule several drafts in one request; per-draft errors are reported in results"""
+    result = await content_scheduler.reschedule_content_batch(
+        db,
+        user_id=current_user.id,
+        items=[item.model_dump() for item in request.items]
+    )
+    
+    if "error" in result:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
+        )
+    
+    await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": result
+    }
+
+@router.post("/drafts/cancel:batch")
+async def cancel_scheduled_content_batch(
+    request: BatchCancelRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel several scheduled drafts in one request; per-draft errors are reported in results"""
+    result = await content_scheduler.cancel_scheduled_content_batch(
+        db,
+        user_id=current_user.id,
+        draft_ids=request.draft_ids
+    )
+    
+    if "error" in result:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to reschedule content"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
         )
+    
+    if result["cancelled"]:
+        await invalidate_content_caches(current_user.id)
+    
+    return {
+        "success": True,
+        "data": result
+    }
 
 @router.get("/scheduled")
 async def get_scheduled_content(
@@ -330,22 +472,33 @@ async def get_scheduled_content(
     current_user: User = Depends(get_current_user)
 ):
     """Get all scheduled content for user"""
-    try:
+    cache_key = f"scheduled:{current_user.id}:{days_ahead}"
+    scheduled_content = await cache_get(cache_key)
+    if scheduled_content is None:
         scheduled_content = await content_scheduler.get_scheduled_content(
             current_user.id, days_ahead
         )
-        
-        return {
-            "success": True,
-            "data": scheduled_content
-        }
-        
-    except Exception as e:
-        print(f"Error fetching scheduled content: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch scheduled content"
-        )
+        await cache_set(cache_key, scheduled_content, SCHEDULED_CACHE_TTL)
+    
+    return {
+        "success": True,
+        "data": scheduled_content
+    }
+
+@router.get("/scheduled/stream")
+async def stream_scheduled_content(
+    days_ahead: int = Query(default=7, ge=1, le=30),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream scheduled content as NDJSON, one item per line"""
+    now = datetime.now()
+    query = select(Draft).where(
+        Draft.user_id == current_user.id,
+        Draft.status == "scheduled",
+        Draft.scheduled_for.between(now, now + timedelta(days=days_ahead))
+    ).order_by(Draft.scheduled_for)
+    
+    return _ndjson_response(query, lambda row: scheduled_content_entry(row.Draft))
 
 @router.post("/drafts/{draft_id}/publish")
 async def publish_content_immediately(
@@ -353,28 +506,21 @@ async def publish_content_immediately(
     current_user: User = Depends(get_current_user)
 ):
     """Publish content immediately"""
-    try:
-        result = await content_publisher.publish_content(draft_id)
-        
-        if "error" in result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result["error"]
-            )
-        
-        return {
-            "success": True,
-            "data": result
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error publishing content: {e}")
+    result = await content_publisher.publish_content(draft_id)
+    
+    if "error" in result:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to publish content"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=result["error"]
         )
+    
+    await invalidate_content_caches(current_user.id)
+    await cache_delete_pattern(f"insights:{current_user.id}:*")
+    
+    return {
+        "success": True,
+        "data": result
+    }
 
 # Performance and Analytics Endpoints
 @router.get("/posts/{post_id}/performance")
@@ -383,7 +529,9 @@ async def get_post_performance(
     current_user: User = Depends(get_current_user)
 ):
     """Get performance metrics for a published post"""
-    try:
+    cache_key = f"perf:{post_id}:{current_user.id}"
+    result = await cache_get(cache_key)
+    if result is None:
         result = await content_publisher.get_post_performance(post_id, current_user.id)
         
         if "error" in result:
@@ -392,19 +540,12 @@ async def get_post_performance(
                 detail=result["error"]
             )
         
-        return {
-            "success": True,
-            "data": result
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error fetching post performance: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch post performance"
-        )
+        await cache_set(cache_key, result, POST_PERFORMANCE_CACHE_TTL)
+    
+    return {
+        "success": True,
+        "data": result
+    }
 
 @router.get("/insights")
 async def get_performance_insights(
@@ -412,17 +553,13 @@ async def get_performance_insights(
     current_user: User = Depends(get_current_user)
 ):
     """Get performance insights and recommendations"""
-    try:
+    cache_key = f"insights:{current_user.id}:{days}"
+    insights = await cache_get(cache_key)
+    if insights is None:
         insights = await engagement_tracker.get_performance_insights(current_user.id, days)
-        
-        return {
-            "success": True,
-            "data": insights
-        }
-        
-    except Exception as e:
-        print(f"Error fetching performance insights: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch performance insights"
-        )
\ No newline at end of file
+        await cache_set(cache_key, insights, INSIGHTS_CACHE_TTL)
+    
+    return {
+        "success": True,
+        "data": insights
+    }
\ No newline at end of file
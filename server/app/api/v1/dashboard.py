@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Query
+import asyncio
+
+from app.core.database import AsyncSessionLocal
+from app.core.dependencies import get_current_user
+from app.models.user import User
+from app.api.v1.analytics import MOCK_RECOMMENDATIONS, build_analytics, build_engagement_trends
+from app.api.v1.content import list_drafts
+
+router = APIRouter()
+
+async def _with_session(build, *args):
+    # Each concurrent query gets its own session; one AsyncSession can't run
+    # statements in parallel
+    async with AsyncSessionLocal() as db:
+        return await build(db, *args)
+
+@router.get("")
+async def get_dashboard(
+    range: str = Query("week", regex="^(week|month|quarter)$"),
+    days: int = Query(30, le=90),
+    current_user: User = Depends(get_current_user)
+):
+    """Get analytics, engagement trends, recommendations and drafts in one call"""
+    analytics, drafts = await asyncio.gather(
+        _with_session(build_analytics, current_user.id, range),
+        _with_session(list_drafts, current_user.id)
+    )
+    
+    return {
+        "success": True,
+        "data": {
+            "analytics": analytics,
+            "engagementTrends": build_engagement_trends(days),
+            "recommendations": MOCK_RECOMMENDATIONS,
+            "drafts": drafts
+        }
+    }
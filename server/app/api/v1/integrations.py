@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
 from pydantic import BaseModel
 from typing import List, Optional
+import orjson
 
-from app.core.database import get_db
+from app.core.cache import cache_delete, cache_get, cache_set, redis_client
+from app.core.database import dialect_insert, get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.models.chat import Integration
@@ -12,6 +14,19 @@ from app.services.oauth_service import oauth_manager
 
 router = APIRouter()
 
+# Per-user integrations list cache TTL (seconds); connect/disconnect invalidate it
+INTEGRATIONS_CACHE_TTL = 60
+
+# Pending OAuth flows live in Redis so any worker can complete them; abandoned
+# flows expire after OAUTH_STATE_TTL seconds
+OAUTH_STATE_TTL = 600
+
+def _integrations_cache_key(user_id: int) -> str:
+    return f"integrations:{user_id}"
+
+def _oauth_state_key(state: str) -> str:
+    return f"oauth:state:{state}"
+
 class ConnectIntegrationRequest(BaseModel):
     type: str  # twitter, linkedin, notion
     auth_code: str
@@ -30,6 +45,18 @@ async def initiate_oauth_flow(
     try:
         auth_data = await oauth_manager.initiate_oauth_flow(request.type)
         
+        # The PKCE verifier stays server-side; the callback only echoes `state`
+        code_verifier = auth_data.pop("code_verifier", None)
+        await redis_client.setex(
+            _oauth_state_key(auth_data["state"]),
+            OAUTH_STATE_TTL,
+            orjson.dumps({
+                "user_id": current_user.id,
+                "type": request.type,
+                "code_verifier": code_verifier
+            })
+        )
+        
         return {
             "success": True,
             "data": auth_data
@@ -40,94 +67,89 @@ async def initiate_oauth_flow(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
-    except Exception as e:
-        print(f"Error initiating OAuth: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to initiate OAuth flow"
-        )
 
 @router.post("/oauth/complete")
 async def complete_oauth_flow(
     request: ConnectIntegrationRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Complete OAuth flow and store integration"""
-    try:
-        # Complete OAuth flow
-        token_data = await oauth_manager.complete_oauth_flow(
-            request.type,
-            request.auth_code,
-            request.state,
-            request.code_verifier
-        )
-        
-        # Test integration
-        test_result = await oauth_manager.test_integration(
-            request.type,
-            token_data["access_token"]
-        )
-        
-        if not test_result.get("success"):
+    code_verifier = request.code_verifier
+    if request.state:
+        # State is single-use: GETDEL consumes it so a callback can't be replayed
+        payload = await redis_client.getdel(_oauth_state_key(request.state))
+        payload = orjson.loads(payload) if payload is not None else None
+        if not payload or payload["user_id"] != current_user.id or payload["type"] != request.type:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Integration test failed"
-            )
-        
-        # Store integration
-        existing = db.query(Integration).filter(
-            Integration.user_id == current_user.id,
-            Integration.type == request.type
-        ).first()
-        
-        if existing:
-            existing.status = "connected"
-            existing.connected_at = func.now()
-            existing.credentials = token_data["access_token"]  # In production: encrypt this
-            existing.permissions = test_result.get("capabilities", [])
-            integration = existing
-        else:
-            integration = Integration(
-                user_id=current_user.id,
-                type=request.type,
-                status="connected",
-                connected_at=func.now(),
-                credentials=token_data["access_token"],  # In production: encrypt this
-                permissions=test_result.get("capabilities", [])
+                detail="Invalid or expired OAuth state"
             )
-            db.add(integration)
-        
-        db.commit()
-        db.refresh(integration)
-        
-        return {
-            "success": True,
-            "data": {
-                "id": integration.id,
-                "type": integration.type,
-                "status": integration.status,
-                "connected_at": integration.connected_at.isoformat(),
-                "permissions": integration.permissions,
-                "user_info": test_result.get("user_info", {}),
-                "capabilities": test_result.get("capabilities", [])
-            }
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error completing OAuth: {e}")
+        code_verifier = payload["code_verifier"] or code_verifier
+    
+    # Complete OAuth flow
+    token_data = await oauth_manager.complete_oauth_flow(
+        request.type,
+        request.auth_code,
+        request.state,
+        code_verifier
+    )
+    
+    # Test integration
+    test_result = await oauth_manager.test_integration(
+        request.type,
+        token_data["access_token"]
+    )
+    
+    if not test_result.get("success"):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to complete integration"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Integration test failed"
         )
+    
+    # Store integration: one INSERT ... ON CONFLICT (user_id, type) DO UPDATE
+    stmt = dialect_insert(Integration).values(
+        user_id=current_user.id,
+        type=request.type,
+        status="connected",
+        connected_at=func.now(),
+        credentials=token_data["access_token"],  # In production: encrypt this
+        permissions=test_result.get("capabilities", [])
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Integration.user_id, Integration.type],
+        set_={
+            "status": stmt.excluded.status,
+            "connected_at": stmt.excluded.connected_at,
+            "credentials": stmt.excluded.credentials,
+            "permissions": stmt.excluded.permissions,
+            "updated_at": func.now()
+        }
+    ).returning(Integration)
+    
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    integration = result.scalars().one()
+    await db.commit()
+    await cache_delete(_integrations_cache_key(current_user.id))
+    
+    return {
+        "success": True,
+        "data": {
+            "id": integration.id,
+            "type": integration.type,
+            "status": integration.status,
+            "connected_at": integration.connected_at,
+            "permissions": integration.permissions,
+            "user_info": test_result.get("user_info", {}),
+            "capabilities": test_result.get("capabilities", [])
+        }
+    }
 
 @router.post("/connect")
 async def connect_integration(
     request: ConnectIntegrationRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Legacy endpoint - redirect to OAuth complete"""
     return await complete_oauth_flow(request, current_user, db)
@@ -135,70 +157,65 @@ async def connect_integration(
 @router.get("")
 async def get_integrations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user's integrations"""
-    try:
-        integrations = db.query(Integration)\
-            .filter(Integration.user_id == current_user.id)\
-            .all()
-        
+    cache_key = _integrations_cache_key(current_user.id)
+    cached = await cache_get(cache_key)
+    if cached is not None:
         return {
             "success": True,
-            "data": [
-                {
-                    "id": integration.id,
-                    "type": integration.type,
-                    "status": integration.status,
-                    "permissions": integration.permissions,
-                    "connectedAt": integration.connected_at.isoformat() if integration.connected_at else None,
-                    "lastSyncAt": integration.last_sync_at.isoformat() if integration.last_sync_at else None
-                }
-                for integration in integrations
-            ]
+            "data": cached
         }
-        
-    except Exception as e:
-        print(f"Error fetching integrations: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch integrations"
-        )
+    
+    result = await db.execute(
+        select(Integration).where(Integration.user_id == current_user.id)
+    )
+    integrations = [
+        {
+            "id": integration.id,
+            "type": integration.type,
+            "status": integration.status,
+            "permissions": integration.permissions,
+            "connectedAt": integration.connected_at,
+            "lastSyncAt": integration.last_sync_at
+        }
+        for integration in result.scalars()
+    ]
+    
+    await cache_set(cache_key, integrations, INTEGRATIONS_CACHE_TTL)
+    return {
+        "success": True,
+        "data": integrations
+    }
 
 @router.delete("/{integration_id}")
 async def disconnect_integration(
     integration_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Disconnect an integration"""
-    try:
-        integration = db.query(Integration)\
-            .filter(
-                Integration.id == integration_id,
-                Integration.user_id == current_user.id
-            ).first()
-        
-        if not integration:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Integration not found"
-            )
-        
-        integration.status = "disconnected"
-        integration.credentials = None
-        db.commit()
-        
-        return {
-            "success": True,
-            "message": "Integration disconnected"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error disconnecting integration: {e}")
+    result = await db.execute(
+        update(Integration)
+        .where(
+            Integration.id == integration_id,
+            Integration.user_id == current_user.id
+        )
+        .values(status="disconnected", credentials=None)
+        .returning(Integration.id)
+    )
+    
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to disconnect integration"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Integration not found"
+        )
+    
+    await db.commit()
+    await cache_delete(_integrations_cache_key(current_user.id))
+    
+    return {
+        "success": True,
+        "message": "Integration disconnected"
+    }
\ No newline at end of file
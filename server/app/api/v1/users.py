@@ -1,14 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from celery.result import AsyncResult
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Optional, List, Dict, Any
+import hashlib
+import orjson
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user
+from app.core.cache import cache_delete, cache_get, cache_set, profile_cache_key
+from app.core.celery_app import celery_app
+from app.core.database import DEBUG_LOADER_OPTIONS, dialect_insert, get_db
+from app.core.dependencies import get_current_user, invalidate_user_cache
 from app.models.user import User, UserProfile
+from app.schemas.user import UserProfileEnvelope, UserProfileResponse
+from app.services.ai_service import ai_service
+from app.services.voice_service import analyze_voice_task, build_voice_profile
 
 router = APIRouter()
 
+# Profile read cache TTL (seconds); profile and voice updates invalidate it
+PROFILE_CACHE_TTL = 300
+
+# Preferences for newly created profiles. Only ever bound into an INSERT
+# (serialized, never mutated), so it is shared rather than copied per request
+DEFAULT_PREFERENCES = {
+    "notifications": {
+        "drafts": True,
+        "approvals": True,
+        "analytics": True,
+        "engagement": True
+    },
+    "posting": {
+        "autoApprove": False,
+        "bestTimeOnly": True,
+        "requireModeration": True
+    },
+    "consultation": {
+        "proactive": True,
+        "frequency": "daily"
+    }
+}
+
+# Bounds on voice analysis input, enforced during request validation so
+# oversized payloads are rejected before reaching the AI service
+MAX_VOICE_SAMPLES = 20
+MAX_VOICE_SAMPLE_LENGTH = 4000
+
+def _profile_etag(data: Dict[str, Any]) -> str:
+    """Strong ETag over the profile's JSON form"""
+    return '"%s"' % hashlib.blake2b(orjson.dumps(data), digest_size=8).hexdigest()
+
 class UserProfileRequest(BaseModel):
     goals: Optional[List[str]] = None
     themes: Optional[List[str]] = None
@@ -16,170 +58,182 @@ class UserProfileRequest(BaseModel):
     preferences: Optional[Dict[str, Any]] = None
 
 class VoiceAnalysisRequest(BaseModel):
-    samples: List[str]
+    samples: List[Annotated[str, StringConstraints(max_length=MAX_VOICE_SAMPLE_LENGTH)]] = Field(
+        min_length=1, max_length=MAX_VOICE_SAMPLES
+    )
+
+async def _load_user_profile(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+    """Fetch the user's profile, creating the default one on first access"""
+    result = await db.execute(
+        select(UserProfile)
+        .where(UserProfile.user_id == user_id)
+        .options(*DEBUG_LOADER_OPTIONS)
+    )
+    profile = result.scalars().first()
+    
+    if not profile:
+        # Create default profile; if a concurrent request created it first,
+        # the no-op conflict update still returns that row
+        stmt = dialect_insert(UserProfile).values(
+            user_id=user_id,
+            goals=[],
+            themes=[],
+            voice_profile={},
+            preferences=DEFAULT_PREFERENCES
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserProfile.user_id],
+            set_={"user_id": stmt.excluded.user_id}
+        ).returning(UserProfile)
+        
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        profile = result.scalars().one()
+        await db.commit()
+    
+    return UserProfileResponse.model_validate(profile).model_dump(mode="json")
 
-@router.get("/profile")
+@router.get("/profile", response_model=UserProfileEnvelope)
 async def get_user_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user profile"""
-    try:
-        profile = db.query(UserProfile)\
-            .filter(UserProfile.user_id == current_user.id)\
-            .first()
-        
-        if not profile:
-            # Create default profile
-            profile = UserProfile(
-                user_id=current_user.id,
-                goals=[],
-                themes=[],
-                voice_profile={},
-                preferences={
-                    "notifications": {
-                        "drafts": True,
-                        "approvals": True,
-                        "analytics": True,
-                        "engagement": True
-                    },
-                    "posting": {
-                        "autoApprove": False,
-                        "bestTimeOnly": True,
-                        "requireModeration": True
-                    },
-                    "consultation": {
-                        "proactive": True,
-                        "frequency": "daily"
-                    }
-                }
-            )
-            db.add(profile)
-            db.commit()
-            db.refresh(profile)
-        
-        return {
-            "success": True,
-            "data": {
-                "userId": current_user.id,
-                "goals": profile.goals or [],
-                "themes": profile.themes or [],
-                "voiceProfile": profile.voice_profile or {},
-                "preferences": profile.preferences or {},
-                "integrations": [],  # Would fetch from integrations table
-                "createdAt": profile.created_at.isoformat(),
-                "updatedAt": profile.updated_at.isoformat() if profile.updated_at else None
-            }
-        }
-        
-    except Exception as e:
-        print(f"Error fetching user profile: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch user profile"
-        )
+    cache_key = profile_cache_key(current_user.id)
+    data = await cache_get(cache_key)
+    if data is None:
+        data = await _load_user_profile(db, current_user.id)
+        await cache_set(cache_key, data, PROFILE_CACHE_TTL)
+    
+    # Clients revalidate with If-None-Match and get a bodiless 304 when unchanged
+    etag = _profile_etag(data)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return {
+        "success": True,
+        "data": data
+    }
 
-@router.put("/profile")
+@router.put("/profile", response_model=UserProfileEnvelope)
 async def update_user_profile(
     request: UserProfileRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user profile"""
-    try:
-        profile = db.query(UserProfile)\
-            .filter(UserProfile.user_id == current_user.id)\
-            .first()
-        
-        if not profile:
-            profile = UserProfile(user_id=current_user.id)
-            db.add(profile)
-        
-        # Update fields if provided
-        if request.goals is not None:
-            profile.goals = request.goals
-        if request.themes is not None:
-            profile.themes = request.themes
-        if request.voice_profile is not None:
-            profile.voice_profile = request.voice_profile
-        if request.preferences is not None:
-            profile.preferences = request.preferences
-        
-        db.commit()
-        db.refresh(profile)
-        
-        return {
-            "success": True,
-            "data": {
-                "userId": current_user.id,
-                "goals": profile.goals or [],
-                "themes": profile.themes or [],
-                "voiceProfile": profile.voice_profile or {},
-                "preferences": profile.preferences or {},
-                "updatedAt": profile.updated_at.isoformat()
-            }
+    # Update fields if provided: one INSERT ... ON CONFLICT (user_id) DO UPDATE
+    fields = request.model_dump(exclude_none=True)
+    stmt = dialect_insert(UserProfile).values(user_id=current_user.id, **fields)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProfile.user_id],
+        set_={
+            **{field: stmt.excluded[field] for field in fields},
+            "updated_at": func.now()
         }
-        
-    except Exception as e:
-        print(f"Error updating user profile: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update user profile"
-        )
+    ).returning(UserProfile)
+    
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    profile = result.scalars().one()
+    await db.commit()
+    await cache_delete(profile_cache_key(current_user.id))
+    await invalidate_user_cache(current_user.id)
+    
+    return {
+        "success": True,
+        "data": profile
+    }
 
 @router.post("/voice/analyze")
 async def analyze_voice_samples(
     request: VoiceAnalysisRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Analyze voice samples to create voice profile"""
-    try:
-        from app.services.ai_service import ai_service
-        
-        # Analyze voice samples
-        voice_analysis = await ai_service.analyze_voice_samples(request.samples)
-        
-        if "error" in voice_analysis:
+    # Analyze voice samples
+    voice_analysis = await ai_service.analyze_voice_samples(request.samples)
+    
+    if "error" in voice_analysis:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=voice_analysis["error"]
+        )
+    
+    # Update user profile with voice analysis
+    result = await db.execute(
+        select(UserProfile)
+        .where(UserProfile.user_id == current_user.id)
+        .options(*DEBUG_LOADER_OPTIONS)
+    )
+    profile = result.scalars().first()
+    
+    if not profile:
+        profile = UserProfile(user_id=current_user.id)
+        db.add(profile)
+    
+    # Create voice profile structure
+    profile.voice_profile = build_voice_profile(current_user.id, request.samples, voice_analysis, profile)
+    await db.commit()
+    await cache_delete(profile_cache_key(current_user.id))
+    
+    return {
+        "success": True,
+        "data": voice_analysis
+    }
+
+@router.post("/voice/analyze/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def analyze_voice_samples_job(
+    request: VoiceAnalysisRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Queue voice analysis; poll /voice/analyze/jobs/{job_id} for the result"""
+    # Publishing to the broker is blocking I/O, so keep it off the event loop
+    job = await run_in_threadpool(
+        analyze_voice_task.apply_async,
+        kwargs={"user_id": current_user.id, "samples": request.samples},
+        retry=False
+    )
+    
+    return {
+        "success": True,
+        "data": {
+            "job_id": job.id,
+            "status": "queued",
+            "status_url": f"/v1/user/voice/analyze/jobs/{job.id}"
+        }
+    }
+
+@router.get("/voice/analyze/jobs/{job_id}")
+async def get_voice_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a voice analysis job"""
+    job = AsyncResult(job_id, app=celery_app)
+    state = await run_in_threadpool(lambda: job.state)
+    data = {"job_id": job_id, "status": state}
+    
+    if state == "SUCCESS":
+        result = await run_in_threadpool(lambda: job.result)
+        if result.get("user_id") != current_user.id:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=voice_analysis["error"]
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
             )
-        
-        # Update user profile with voice analysis
-        profile = db.query(UserProfile)\
-            .filter(UserProfile.user_id == current_user.id)\
-            .first()
-        
-        if not profile:
-            profile = UserProfile(user_id=current_user.id)
-            db.add(profile)
-        
-        # Create voice profile structure
-        voice_profile = {
-            "id": f"voice_{current_user.id}",
-            "samples": request.samples,
-            "tone": voice_analysis.get("tone", {}),
-            "style": voice_analysis.get("style", {}),
-            "summary": voice_analysis.get("summary", ""),
-            "createdAt": profile.created_at.isoformat() if profile.created_at else None,
-            "updatedAt": profile.updated_at.isoformat() if profile.updated_at else None
-        }
-        
-        profile.voice_profile = voice_profile
-        db.commit()
-        db.refresh(profile)
-        
-        return {
-            "success": True,
-            "data": voice_analysis
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error analyzing voice: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to analyze voice samples"
-        )
\ No newline at end of file
+        voice_analysis = result["voice_analysis"]
+        if "error" in voice_analysis:
+            data["error"] = voice_analysis["error"]
+        else:
+            data["voice_analysis"] = voice_analysis
+    elif state == "FAILURE":
+        data["error"] = "Voice analysis failed"
+    
+    return {
+        "success": True,
+        "data": data
+    }
@@ -0,0 +1,124 @@
+from typing import Any, List, Optional
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+# Shared async Redis client. Caching is best-effort: every helper swallows
+# Redis errors so the API keeps working (uncached) when Redis is unavailable.
+redis_client = aioredis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_connect_timeout=0.5
+)
+
+# Sync client for Celery workers, which run outside the API event loop
+sync_redis_client = redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_connect_timeout=0.5
+)
+
+def profile_cache_key(user_id: int) -> str:
+    return f"profile:{user_id}"
+
+def user_content_cache_patterns(user_id: int) -> List[str]:
+    """Key patterns for a user's cached drafts, scheduled content and analytics"""
+    return [f"drafts:{user_id}:*", f"scheduled:{user_id}:*", f"analytics:{user_id}:*"]
+
+def _encode_default(value: Any) -> Any:
+    # Pydantic models (e.g. DraftResponse) are cached as their JSON form
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Get a cached JSON value, or None on a miss"""
+    try:
+        cached = await redis_client.get(key)
+    except RedisError:
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Cache a JSON-serializable value for ttl seconds; datetimes are stored as ISO 8601"""
+    try:
+        await redis_client.setex(key, ttl, orjson.dumps(value, default=_encode_default))
+    except RedisError:
+        pass
+
+async def cache_delete(*keys: str) -> None:
+    """Delete cached keys"""
+    if not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError:
+        pass
+
+async def cache_set_indexed(key: str, value: Any, ttl: int, index_key: str, index_ttl: int) -> None:
+    """cache_set, also recording the key in a set so cache_delete_indexed can drop it
+
+    index_ttl should be at least the longest ttl of any key added to the index
+    """
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, ttl, orjson.dumps(value, default=_encode_default))
+            pipe.sadd(index_key, key)
+            pipe.expire(index_key, index_ttl)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+async def cache_delete_indexed(index_key: str) -> None:
+    """Delete every key recorded in an index set by cache_set_indexed, and the set"""
+    try:
+        keys = await redis_client.smembers(index_key)
+        await redis_client.delete(index_key, *keys)
+    except RedisError:
+        pass
+
+async def cache_delete_pattern(pattern: str) -> None:
+    """Delete every cached key matching a glob pattern"""
+    try:
+        keys = [key async for key in redis_client.scan_iter(match=pattern)]
+        if keys:
+            await redis_client.delete(*keys)
+    except RedisError:
+        pass
+
+def cache_delete_pattern_sync(pattern: str) -> None:
+    """Delete every cached key matching a glob pattern (for Celery workers)"""
+    try:
+        keys = list(sync_redis_client.scan_iter(match=pattern))
+        if keys:
+            sync_redis_client.delete(*keys)
+    except RedisError:
+        pass
+
+def cache_get_sync(key: str) -> Optional[Any]:
+    """Get a cached JSON value, or None on a miss (usable from any event loop or thread)"""
+    try:
+        cached = sync_redis_client.get(key)
+    except RedisError:
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+def cache_set_sync(key: str, value: Any, ttl: int) -> None:
+    """Cache a JSON-serializable value for ttl seconds (usable from any event loop or thread)"""
+    try:
+        sync_redis_client.setex(key, ttl, orjson.dumps(value, default=_encode_default))
+    except RedisError:
+        pass
+
+def cache_delete_sync(*keys: str) -> None:
+    """Delete cached keys (for Celery workers)"""
+    if not keys:
+        return
+    try:
+        sync_redis_client.delete(*keys)
+    except RedisError:
+        pass
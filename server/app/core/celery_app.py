@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Coroutine, Optional
+
+from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
+
+# Initialize Celery for background tasks
+celery_app = Celery(
+    'nexus_scheduler',
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+    include=[
+        'app.services.scheduler_service',
+        'app.services.analytics_service',
+        'app.services.generation_service',
+        'app.services.voice_service',
+    ]
+)
+
+# Long-running LLM tasks get their own queue so they can't starve publishing;
+# run a worker for it with `celery -A app.core.celery_app worker -Q llm`
+celery_app.conf.task_routes = {
+    'generate_content_task': {'queue': 'llm'},
+    'analyze_voice_task': {'queue': 'llm'},
+}
+
+# Periodic tasks (run with `celery -A app.core.celery_app beat`)
+celery_app.conf.beat_schedule = {
+    'rollup-daily-analytics': {
+        'task': 'rollup_daily_analytics',
+        'schedule': crontab(hour=0, minute=15),
+    },
+}
+celery_app.conf.timezone = 'UTC'
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine from a task on this worker process's persistent event loop
+
+    Unlike asyncio.run(), the loop outlives the task, so process-wide async
+    clients (e.g. the AI service's HTTP connection pool) stay usable
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(coro)
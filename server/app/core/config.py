@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Optional
 from pydantic_settings import BaseSettings
 
@@ -11,6 +12,11 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./nexus.db"  # Change to PostgreSQL for production
+    # Connection pool sizing (ignored for SQLite)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
     
     # Firebase
     FIREBASE_CREDENTIALS_PATH: Optional[str] = None
@@ -19,10 +25,21 @@ class Settings(BaseSettings):
     # AI Services
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
+    # Max in-flight provider calls per process; excess calls wait their turn
+    LLM_MAX_CONCURRENT: int = 16
+    # Hedged chat: if OpenAI hasn't answered after LLM_HEDGE_DELAY seconds,
+    # also ask Anthropic and use the first reply; at most LLM_HEDGE_MAX_RATIO
+    # of chat calls may be hedged
+    LLM_HEDGE_CHAT: bool = False
+    LLM_HEDGE_DELAY: float = 2.0
+    LLM_HEDGE_MAX_RATIO: float = 0.05
+    # Optional joblib TF-IDF vectorizer fitted offline on a neutral corpus,
+    # loaded read-only; voice embeddings are hashed when unset
+    VOICE_VECTORIZER_PATH: Optional[str] = None
     
     # OAuth Configuration
     # Base URLs for redirects (environment-specific)
-    FRONTEND_URL: str = "http://localhost:3000"
+    FRONTEND_URL: str = "http://localhost:3000"  # Comma-separated; also the allowed CORS origins
     API_BASE_URL: str = "http://localhost:8000"
     
     # Google OAuth
@@ -56,4 +73,9 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings parsed once from the environment/.env and shared"""
+    return Settings()
+
+settings = get_settings()
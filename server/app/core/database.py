@@ -1,21 +1,108 @@
-from sqlalchemy import create_engine
+from sqlalchemy import JSON, create_engine, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import raiseload, sessionmaker
 
 from app.core.config import settings
 
+def _async_database_url(url: str) -> str:
+    """Map the configured DATABASE_URL onto its asyncio driver"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+# Connection pool sizing for server databases (SQLite keeps its default pool).
+# Connections are reused across requests and checked with a ping before use,
+# so dead connections are replaced instead of stalling a request. For the sync
+# engine, pool_size should not exceed the worker threadpool size or threads
+# just queue on the pool.
+POOL_OPTIONS = {} if "sqlite" in settings.DATABASE_URL else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": True
+}
+
+# Sync engine: used for table creation and by background workers (Celery)
 engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    settings.DATABASE_URL,
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    **POOL_OPTIONS
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: used by API request handlers so DB I/O doesn't block the event loop
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    **POOL_OPTIONS
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# JSON column type: JSONB on PostgreSQL (stored parsed, indexable with GIN),
+# plain JSON elsewhere
+JSONType = JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+# Loader options for queries whose results are serialized straight away: in
+# DEBUG any lazy relationship access on them raises instead of silently
+# issuing another SELECT
+DEBUG_LOADER_OPTIONS = (raiseload("*"),) if settings.DEBUG else ()
+
+# Changes create_all can't make to tables that already exist. Every statement
+# is idempotent, so they run on each startup after create_all
+SCHEMA_UPGRADES = (
+    # One integration per (user, type), as the ON CONFLICT upsert in
+    # complete_oauth_flow requires: keep the newest of any duplicates first
+    "DELETE FROM integrations WHERE id NOT IN (SELECT MAX(id) FROM integrations GROUP BY user_id, type)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_integrations_user_type ON integrations (user_id, type)",
+    # Redundant with the drafts primary key, which already serves id + user_id lookups
+    "DROP INDEX IF EXISTS ix_drafts_user_id_id",
+    # Indexes declared on the models after their tables first existed
+    "CREATE INDEX IF NOT EXISTS ix_drafts_user_status_created ON drafts (user_id, status, created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_drafts_user_created ON drafts (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_drafts_status_scheduled_for ON drafts (status, scheduled_for)",
+    "CREATE INDEX IF NOT EXISTS ix_drafts_user_created_approved ON drafts (user_id, created_at) WHERE status = 'approved'",
+    "CREATE INDEX IF NOT EXISTS ix_posts_user_published ON posts (user_id, published_at DESC)",
+    # Chat queries order by id, so the created_at index only left them sorting
+    "DROP INDEX IF EXISTS ix_chat_messages_user_created",
+    "CREATE INDEX IF NOT EXISTS ix_chat_messages_user_id ON chat_messages (user_id, id)",
+)
+
+# Columns added to tables after they were first created: (table, column, SQL type)
+SCHEMA_COLUMN_UPGRADES = (
+    ("drafts", "external_id", "VARCHAR"),
+)
+
+def upgrade_schema(bind=engine) -> None:
+    """Add missing SCHEMA_COLUMN_UPGRADES columns, then apply SCHEMA_UPGRADES, in one transaction"""
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table, column, sql_type in SCHEMA_COLUMN_UPGRADES:
+            if column not in {existing["name"] for existing in inspector.get_columns(table)}:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+        
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
+
+def dialect_insert(entity):
+    """INSERT construct for the configured dialect, supporting ON CONFLICT upserts"""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -1,50 +1,117 @@
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+from datetime import datetime
+import hashlib
+import logging
+import time
 import firebase_admin
 from firebase_admin import credentials, auth
 
-from app.core.database import get_db
+from app.core.cache import cache_delete_indexed, cache_get, cache_set_indexed
+from app.core.database import DEBUG_LOADER_OPTIONS, dialect_insert, get_db
 from app.core.config import settings
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
 # Initialize Firebase Admin SDK (if credentials are available)
 if settings.FIREBASE_CREDENTIALS_PATH:
     try:
         cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
         firebase_admin.initialize_app(cred)
     except Exception as e:
-        print(f"Firebase initialization failed: {e}")
+        logger.error("Firebase initialization failed: %s", e)
 
 security = HTTPBearer()
 
+# Seconds a verified token -> user resolution is cached; bounds how long a
+# deactivated user or revoked token keeps working
+USER_CACHE_TTL = 60
+
+def _user_cache_key(token: str) -> str:
+    return f"user:{hashlib.sha256(token.encode()).hexdigest()}"
+
+def _user_cache_index_key(user_id: int) -> str:
+    return f"user:tokens:{user_id}"
+
+async def invalidate_user_cache(user_id: int) -> None:
+    """Drop every cached token -> user resolution for a user
+
+    Call after logout or after the user row is updated or deactivated
+    """
+    await cache_delete_indexed(_user_cache_index_key(user_id))
+
+def _user_snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+async def _user_from_snapshot(db: AsyncSession, snapshot: dict) -> User:
+    """Rebuild a cached user and attach it to the session without a SELECT"""
+    for key in ("created_at", "updated_at"):
+        if snapshot.get(key):
+            snapshot[key] = datetime.fromisoformat(snapshot[key])
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
 async def get_current_user(
     token: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
     try:
-        # Verify Firebase ID token
+        # Users resolved within the last USER_CACHE_TTL seconds skip token
+        # verification and the user SELECT
+        cache_key = _user_cache_key(token.credentials)
+        snapshot = await cache_get(cache_key)
+        if snapshot is not None:
+            user = await _user_from_snapshot(db, snapshot)
+            if not user.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Inactive user"
+                )
+            return user
+        
+        # Verify Firebase ID token (blocking crypto and JWKS fetch, so off the event loop)
+        cache_ttl = USER_CACHE_TTL
         if settings.FIREBASE_CREDENTIALS_PATH:
-            decoded_token = auth.verify_id_token(token.credentials)
+            decoded_token = await run_in_threadpool(auth.verify_id_token, token.credentials)
             firebase_uid = decoded_token['uid']
+            # Never serve a token from cache past its expiry
+            cache_ttl = min(cache_ttl, int(decoded_token['exp'] - time.time()))
         else:
             # Mock authentication for development
             firebase_uid = "mock_user_123"
         
         # Get user from database
-        user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+        result = await db.execute(
+            select(User)
+            .where(User.firebase_uid == firebase_uid)
+            .options(*DEBUG_LOADER_OPTIONS)
+        )
+        user = result.scalars().first()
         if not user:
-            # Create user if doesn't exist (for demo purposes)
-            user = User(
+            # Create user if doesn't exist (for demo purposes). One INSERT ...
+            # RETURNING; a concurrent first request for the same uid hits the
+            # no-op conflict update and gets the existing row back
+            stmt = dialect_insert(User).values(
                 firebase_uid=firebase_uid,
                 email="demo@example.com",
                 display_name="Demo User",
                 is_active=True
             )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.firebase_uid],
+                set_={"firebase_uid": stmt.excluded.firebase_uid}
+            ).returning(User)
+            
+            result = await db.execute(stmt, execution_options={"populate_existing": True})
+            user = result.scalars().one()
+            await db.commit()
         
         if not user.is_active:
             raise HTTPException(
@@ -52,10 +119,16 @@ async def get_current_user(
                 detail="Inactive user"
             )
         
+        if cache_ttl > 0:
+            await cache_set_indexed(
+                cache_key, _user_snapshot(user), cache_ttl,
+                _user_cache_index_key(user.id), USER_CACHE_TTL
+            )
         return user
         
     except Exception as e:
-        print(f"Authentication error: {e}")
+        # Exception type only: messages can echo token contents
+        logger.warning("Authentication failed: %s", type(e).__name__)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
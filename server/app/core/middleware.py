@@ -0,0 +1,30 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+# Media types streamed incrementally (SSE chat, NDJSON listings); gzip would
+# hold their events back in the compressor buffer
+INCREMENTAL_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+
+class _StreamingAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(INCREMENTAL_MEDIA_TYPES):
+                # Treated like an already-encoded response: passed through as is
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip responses, except incrementally streamed ones"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _StreamingAwareGZipResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -1,26 +1,60 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+import asyncio
+import logging
 import uvicorn
 
 from app.core.config import settings
 from app.core.dependencies import get_current_user
-from app.api.v1 import auth, content, chat, integrations, analytics, users
-from app.core.database import engine, Base
+from app.core.logging_config import setup_logging
+from app.core.middleware import StreamingAwareGZipMiddleware
+from app.api.v1 import auth, content, chat, integrations, analytics, users, dashboard
+from app.core.database import engine, Base, upgrade_schema
+from app.services.ai_service import ai_service
+from app.services.analytics_service import rollup_daily_analytics
 
-# Create database tables
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Create database tables, then bring existing ones up to date
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+async def _backfill_analytics_rollups() -> None:
+    """Rebuild the analytics rollup window off the event loop"""
+    try:
+        await run_in_threadpool(rollup_daily_analytics)
+    except Exception:
+        logger.exception("Analytics rollup backfill failed")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Backfill analytics rollups so reports don't wait for the first nightly
+    # run; startup doesn't wait for it, days not rolled up yet are counted live
+    backfill = asyncio.create_task(_backfill_analytics_rollups())
+    yield
+    await backfill
+    # Release pooled provider connections on shutdown
+    await ai_service.aclose()
 
 app = FastAPI(
     title="Nexus Personal AI API",
     description="AI-powered personal assistant for content creation and automation",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
-# CORS middleware
+# Compress JSON responses over 500 bytes (streamed SSE/NDJSON pass through)
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=500, compresslevel=5)
+
+# CORS middleware: FRONTEND_URL may list several comma-separated origins
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure this properly for production
+    allow_origins=[origin.strip() for origin in settings.FRONTEND_URL.split(",")],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -38,10 +72,13 @@ app.include_router(content.router, prefix="/v1/content", tags=["content"])
 app.include_router(chat.router, prefix="/v1/chat", tags=["chat"])
 app.include_router(integrations.router, prefix="/v1/integrations", tags=["integrations"])
 app.include_router(analytics.router, prefix="/v1/analytics", tags=["analytics"])
+app.include_router(dashboard.router, prefix="/v1/dashboard", tags=["dashboard"])
 
-# Global exception handler
+# Global exception handler: the single place unhandled errors are logged
+# and turned into a 500 response
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
     return JSONResponse(
         status_code=500,
         content={
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
-from app.core.database import Base
+from app.core.database import Base, JSONType
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -11,10 +11,15 @@ class ChatMessage(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     role = Column(String, nullable=False)  # user, assistant
     content = Column(Text, nullable=False)
-    actions = Column(JSON, nullable=True)  # Available actions for assistant messages
-    context = Column(JSON, nullable=True)  # Additional context data
+    actions = Column(JSONType, nullable=True)  # Available actions for assistant messages
+    context = Column(JSONType, nullable=True)  # Additional context data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Chat context and history page a user's messages by id
+        Index("ix_chat_messages_user_id", user_id, id),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="chat_messages")
 
@@ -26,11 +31,17 @@ class Integration(Base):
     type = Column(String, nullable=False)  # twitter, linkedin, notion
     status = Column(String, default="disconnected")  # connected, disconnected, error
     credentials = Column(Text, nullable=True)  # Encrypted tokens
-    permissions = Column(JSON, nullable=True)
+    permissions = Column(JSONType, nullable=True)
     connected_at = Column(DateTime(timezone=True), nullable=True)
     last_sync_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # A unique index rather than a constraint, so tables created before it
+        # can get the same object from upgrade_schema
+        Index("uq_integrations_user_type", user_id, type, unique=True),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="integrations")
\ No newline at end of file
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Boolean, ForeignKey, Float, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
-from app.core.database import Base
+from app.core.database import Base, JSONType
 
 class Draft(Base):
     __tablename__ = "drafts"
@@ -12,16 +12,28 @@ class Draft(Base):
     content = Column(Text, nullable=False)
     platform = Column(String, nullable=False)  # twitter, linkedin
     status = Column(String, default="pending")  # pending, approved, rejected, scheduled, published
-    variants = Column(JSON, nullable=True)
+    variants = Column(JSONType, nullable=True)
     scheduled_for = Column(DateTime, nullable=True)
     best_time_score = Column(Float, nullable=True)
     moderation_status = Column(String, default="pending")  # pending, approved, flagged
-    moderation_flags = Column(JSON, nullable=True)
-    themes = Column(JSON, nullable=True)
+    moderation_flags = Column(JSONType, nullable=True)
+    themes = Column(JSONType, nullable=True)
     prompt_used = Column(Text, nullable=True)
+    external_id = Column(String, nullable=True)  # Publish task ID while scheduled, platform post ID once published
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_drafts_user_status_created", user_id, status, created_at.desc()),
+        Index("ix_drafts_user_created", user_id, created_at),
+        Index("ix_drafts_status_scheduled_for", status, scheduled_for),
+        Index(
+            "ix_drafts_user_created_approved", user_id, created_at,
+            postgresql_where=status == "approved",
+            sqlite_where=status == "approved"
+        ),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="drafts")
     post = relationship("Post", back_populates="draft", uselist=False)
@@ -36,11 +48,15 @@ class Post(Base):
     content = Column(Text, nullable=False)
     external_id = Column(String, nullable=True)  # Platform-specific post ID
     published_at = Column(DateTime(timezone=True), nullable=False)
-    engagement_data = Column(JSON, nullable=True)
-    themes = Column(JSON, nullable=True)
+    engagement_data = Column(JSONType, nullable=True)
+    themes = Column(JSONType, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_posts_user_published", user_id, published_at.desc()),
+    )
+    
     # Relationships
     draft = relationship("Draft", back_populates="post")
 
@@ -65,5 +81,20 @@ class Feedback(Base):
     type = Column(String, nullable=False)  # draft, consultation, general
     rating = Column(Integer, nullable=False)  # 1-5
     comment = Column(Text, nullable=True)
-    context = Column(JSON, nullable=True)  # Related data
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    context = Column(JSONType, nullable=True)  # Related data
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class DailyUserRollup(Base):
+    __tablename__ = "daily_user_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    drafts_generated = Column(Integer, default=0, nullable=False)
+    drafts_approved = Column(Integer, default=0, nullable=False)  # Drafts created that day and approved
+    posts_published = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_daily_user_rollups_user_date"),
+    )
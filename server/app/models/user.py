@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
-from app.core.database import Base
+from app.core.database import Base, JSONType
 
 class User(Base):
     __tablename__ = "users"
@@ -25,10 +25,15 @@ class UserProfile(Base):
     __tablename__ = "user_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False, unique=True)
-    goals = Column(JSON, nullable=True)
-    themes = Column(JSON, nullable=True)
-    voice_profile = Column(JSON, nullable=True)
-    preferences = Column(JSON, nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    goals = Column(JSONType, nullable=True)
+    themes = Column(JSONType, nullable=True)
+    voice_profile = Column(JSONType, nullable=True)
+    preferences = Column(JSONType, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # Supports containment queries (preferences @> '{...}'); PostgreSQL only
+        Index("ix_user_profiles_preferences_gin", preferences, postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
\ No newline at end of file
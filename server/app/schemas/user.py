@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+
+class UserProfileResponse(BaseModel):
+    user_id: int = Field(alias="userId")
+    goals: List[str] = []
+    themes: List[str] = []
+    voice_profile: Dict[str, Any] = Field(default={}, alias="voiceProfile")
+    preferences: Dict[str, Any] = {}
+    integrations: List[Dict[str, Any]] = []  # Would fetch from integrations table
+    created_at: Optional[datetime] = Field(default=None, alias="createdAt")
+    updated_at: Optional[datetime] = Field(default=None, alias="updatedAt")
+
+    # NULL JSON columns are served as empty values
+    @field_validator("goals", "themes", mode="before")
+    @classmethod
+    def empty_list_if_null(cls, value):
+        return [] if value is None else value
+
+    @field_validator("voice_profile", "preferences", mode="before")
+    @classmethod
+    def empty_dict_if_null(cls, value):
+        return {} if value is None else value
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+
+class UserProfileEnvelope(BaseModel):
+    success: bool = True
+    data: UserProfileResponse
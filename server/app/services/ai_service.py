@@ -1,24 +1,371 @@
 import os
-import json
+import functools
+import hashlib
+import logging
+import random
 import re
+import string
 import numpy as np
-from typing import List, Dict, Any, Optional
+import orjson
+from typing import TYPE_CHECKING, AsyncIterator, FrozenSet, List, Dict, Any, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
-import openai
-from anthropic import Anthropic
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import httpx
 import asyncio
-import aiohttp
+from collections import ChainMap
+from contextlib import aclosing
 
+from app.core.cache import cache_get_sync, cache_set_sync
 from app.core.config import settings
 from app.models.user import User, UserProfile
+from app.services.semantic_cache import SemanticResponseCache
+
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+# System prompts are sent as (static preamble, user context) pairs. The
+# preambles are byte-identical across users and calls, so providers can serve
+# them from their prompt prefix cache; only the context part varies
+SystemPrompt = Tuple[str, str]
+
+PLATFORM_SPECS = {
+    "twitter": "280 characters max, engaging, hashtag-friendly",
+    "linkedin": "professional, thought leadership, longer form allowed"
+}
+
+CONTENT_GENERATION_PREAMBLE = """You are a personal AI content creation assistant. Generate high-quality social media posts based on the user's profile and preferences.
+
+Guidelines:
+- Match the user's voice and style
+- Create engaging, valuable content
+- Include relevant hashtags when appropriate
+- Focus on the user's themes and goals
+- Make each post unique and compelling
+- Follow the platform requirements given with the user context"""
+
+CHAT_SYSTEM_PREAMBLE = """You are a personal AI assistant specialized in content strategy and social media growth.
+You provide concise, actionable advice and can suggest specific actions.
+
+When appropriate, suggest actions like:
+- generate_draft: Create content drafts
+- create_task: Add tasks to Notion
+- schedule_post: Schedule content
+
+Be concise, decisive, and focus on actionable insights."""
+
+# Voice analysis runs at low temperature, so identical samples give
+# effectively identical results; parsed LLM responses are cached this long
+VOICE_ANALYSIS_CACHE_TTL = 86400
+VOICE_ANALYSIS_TEMPERATURE = 0.2
+# Sample batches larger than this (characters) get their local text analysis
+# run in a worker thread
+VOICE_OFFLOAD_THRESHOLD = 16_384
+# Dimensions of the hashed voice embedding used without an offline-fitted vectorizer
+VOICE_EMBEDDING_FEATURES = 100
+
+# Drafts are requested from OpenAI as one JSON object, so variants and themes
+# come back with the posts in the same call
+DRAFT_GENERATION_MODEL = "gpt-4o-mini"
+DRAFTS_JSON_FORMAT = """Respond with a JSON object of the form:
+{"drafts": [{"content": "post text", "variants": ["alternative phrasing", "alternative phrasing"], "themes": ["short topic label"]}]}
+Include one entry per post. Give up to 2 variants for the first 3 posts only (an empty list for the rest) and 1-3 themes per post."""
+
+# Theme label -> keywords, matched as case-insensitive substrings
+CONTENT_THEME_KEYWORDS = {
+    "AI & Technology": ["ai", "artificial intelligence", "machine learning", "automation", "technology", "innovation"],
+    "Business Strategy": ["strategy", "business", "growth", "marketing", "sales", "leadership"],
+    "Productivity": ["productivity", "efficiency", "time management", "workflow", "organization"]
+}
+SIMPLE_THEME_KEYWORDS = {"AI": ["ai"], "marketing": ["marketing"], "strategy": ["strategy"]}
+
+def keyword_pattern(keywords: List[str], whole_words: bool = False) -> "re.Pattern[str]":
+    """One case-insensitive pattern reporting, at each position, the longest keyword starting there
+
+    With whole_words, keywords only match between word boundaries
+    """
+    # The lookahead matches at each position without consuming text, so
+    # overlapping keywords at different positions are all reported. Only one
+    # keyword is reported per position, though: a keyword that is a prefix of
+    # a longer one is missed wherever the longer one matches, so this only
+    # equals separate `in` checks for lists without such prefixes
+    alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    if whole_words:
+        return re.compile(rf"(?=\b({alternation})\b)", re.IGNORECASE)
+    return re.compile(f"(?=({alternation}))", re.IGNORECASE)
+
+def theme_matcher(theme_keywords: Dict[str, List[str]]):
+    """Single-pass matcher returning the theme labels whose keywords appear in a text"""
+    labels = {keyword: label for label, keywords in theme_keywords.items() for keyword in keywords}
+    pattern = keyword_pattern(list(labels))
+    order = list(theme_keywords)
+    
+    def match(content: str) -> List[str]:
+        found = {labels[keyword.lower()] for keyword in pattern.findall(content)}
+        return [label for label in order if label in found]
+    
+    return match
+
+match_content_themes = theme_matcher(CONTENT_THEME_KEYWORDS)
+match_simple_themes = theme_matcher(SIMPLE_THEME_KEYWORDS)
+
+# Chat model per tier: small talk goes to the cheap model, turns likely to
+# need real planning or an action to the strong one
+CHAT_MODEL_TIERS = {"small": "gpt-4o-mini", "strong": "gpt-4o"}
+CHAT_STRONG_TRIGGERS = keyword_pattern(
+    ["strategy", "campaign", "analyze", "analysis", "plan", "generate"], whole_words=True
+)
+
+# Keywords in a chat reply that suggest follow-up actions
+ACTION_KEYWORDS = keyword_pattern(["generate", "post", "content", "task", "todo"])
+
+# Draft and voice analysis patterns, compiled once rather than per call
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+WORD_PATTERN = re.compile(r'\b\w+\b')
+LONG_WORD_PATTERN = re.compile(r'\b\w{8,}\b')
+VOCABULARY_WORD_PATTERN = re.compile(r'\b\w{6,}\b')
+FORMAL_CONNECTIVE_PATTERN = re.compile(r'\b(?:furthermore|however|therefore|consequently)\b')
+JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+TEMPLATE_PLACEHOLDER_PATTERN = re.compile(r'\{[a-z_]+\}')
+EMOJI_PATTERN = re.compile(r'[😀-🙿🌀-🗿🚀-🛿🇦-🇿]+')
+STATISTIC_PATTERN = re.compile(r'\d+%|\d+\s*(percent|x|times)')
+PERCENTAGE_PATTERN = re.compile(r'(\d+)%')
+# Calls to action: action verbs, navigation prompts and opinion requests
+CTA_PATTERN = re.compile(
+    r"\b(follow|like|share|comment|subscribe|join|try|get|download|learn|discover|start"
+    r"|click|tap|swipe|visit|check out"
+    r"|what do you think|thoughts|opinions|agree)\b",
+    re.IGNORECASE
+)
+
+# Word lists for draft analysis, matched as substrings of the lowercased text
+POSITIVE_WORDS = frozenset(["great", "amazing", "awesome", "fantastic", "excellent", "love", "happy", "excited", "brilliant", "wonderful"])
+NEGATIVE_WORDS = frozenset(["bad", "terrible", "awful", "hate", "sad", "disappointed", "frustrated", "angry", "horrible", "worst"])
+HOOK_POWER_WORDS = frozenset(["secret", "surprising", "shocking", "revealed", "exposed"])
+HOOK_URGENCY_WORDS = frozenset(["now", "today", "urgent", "limited", "only"])
+HOOK_CURIOSITY_PHRASES = frozenset(["what if", "imagine if", "here's why", "the reason"])
+ENGAGEMENT_WORDS = frozenset(["insights", "thoughts", "experience", "learned"])
+CONTRARIAN_PHRASES = frozenset(["unpopular", "controversial", "disagree"])
+GOAL_KEYWORDS = {
+    "grow audience": frozenset(["audience", "followers", "reach", "growth"]),
+    "thought leadership": frozenset(["insights", "experience", "opinion", "perspective"]),
+    "engagement": frozenset(["comment", "share", "thoughts", "discussion"])
+}
+# All the above that are matched against a whole draft, found in one scan
+DRAFT_KEYWORD_PATTERN = keyword_pattern(sorted(
+    POSITIVE_WORDS | NEGATIVE_WORDS | ENGAGEMENT_WORDS | CONTRARIAN_PHRASES
+    | frozenset().union(*GOAL_KEYWORDS.values())
+))
+EMOTION_WORDS = {
+    "positive": frozenset(["amazing", "fantastic", "great", "awesome", "love", "excited", "brilliant"]),
+    "negative": frozenset(["terrible", "awful", "hate", "disappointed", "frustrated", "angry"]),
+    "neutral": frozenset(["okay", "fine", "decent", "average", "normal"])
+}
+
+MOCK_CONTENTS = (
+    "🚀 Just discovered a game-changing AI tool that's revolutionizing content creation. The future of marketing is here! #AI #ContentMarketing #Innovation",
+    "Stop overthinking your content strategy. Start with these 3 simple questions: Who? What? Why? Everything else follows. #ContentStrategy #Marketing",
+    "The best content doesn't sell. It serves. Focus on adding value first, and the sales will follow naturally. #ContentMarketing #Value",
+    "Your audience doesn't want perfect content. They want authentic, helpful, and consistent content. Be real. #Authenticity #Content",
+    "Content creation tip: Write for one person, not everyone. When you try to speak to everyone, you speak to no one. #ContentTips #Marketing"
+)
+
+# Mock generation templates per theme, filled by _fill_content_template
+MOCK_CONTENT_TEMPLATES = {
+    "AI": [
+        "🤖 {punchy}AI is transforming {theme} in ways we never imagined. Here's what I learned building with AI for the past month:{formal}",
+        "{question}What if AI could {goal_action}? {insight} {hashtags}",
+        "{statistic} of companies are already using AI for {theme}. Are you ready for what's next? {hashtags}"
+    ],
+    "productivity": [
+        "⚡ {punchy}Stop doing these 3 things that kill your productivity:{formal} {list_items} {hashtags}",
+        "{insight} about productivity: {tip}. Try this for one week and see the difference. {hashtags}",
+        "Productivity hack: {specific_technique}. {result_claim} {hashtags}"
+    ],
+    "strategy": [
+        "🎯 {punchy}Your {goal} strategy is missing this crucial element:{formal} {strategic_insight} {hashtags}",
+        "{contrarian_take} about {theme} strategy. Here's why everyone gets it wrong: {explanation} {hashtags}",
+        "Strategy lesson from {example}: {lesson} {application} {hashtags}"
+    ]
+}
+
+# Character rewrites for platform and tone adjustments, applied in one
+# str.translate pass each
+LINKEDIN_EMOJI_STRIP = str.maketrans("", "", "🚀")
+TONE_DOWN_TRANSLATION = str.maketrans({"🚀": "✨", "!": "."})
+FORMAL_TRANSLATION = str.maketrans({"!": ".", "🚀": None})
+
+# Template components that don't depend on the user, theme or tone
+STATIC_TEMPLATE_COMPONENTS = {
+    "{statistic}": "73%",
+    "{list_items}": "\n1. Multitasking (it doesn't work)\n2. Checking email every 5 minutes\n3. Not setting clear priorities",
+    "{tip}": "focus on systems, not goals",
+    "{result_claim}": "Increased my output by 40%",
+    "{specific_technique}": "the 2-minute rule",
+    "{explanation}": "they focus on tactics instead of fundamentals",
+    "{example}": "Apple's product launches",
+    "{lesson}": "simplicity beats complexity every time"
+}
+
+@functools.lru_cache(maxsize=32)
+def _mock_drafts(count: int, platform: str) -> Tuple[Dict[str, Any], ...]:
+    """Demo drafts, built once per (count, platform)"""
+    return tuple(
+        {
+            "content": content,
+            "platform": platform,
+            "variants": None,
+            "best_time_score": 85 + (i * 2),
+            "themes": ("content marketing", "strategy"),
+            "moderation_status": "approved"
+        }
+        for i, content in enumerate(MOCK_CONTENTS[:count])
+    )
+
+def _ascii_class(char: str) -> int:
+    if char.isupper():
+        return 1
+    if char.islower():
+        return 2
+    if char.isdigit():
+        return 3
+    return 4 if char in string.punctuation else 0
+
+# ASCII byte -> index into ASCII_CLASS_NAMES
+ASCII_CLASS_NAMES = ("other", "upper", "lower", "digit", "punct")
+ASCII_CLASS_TABLE = np.array([_ascii_class(chr(code)) for code in range(128)], dtype=np.intp)
+
+def ascii_char_counts(content: str) -> Dict[str, int]:
+    """Counts of each character class among the ASCII characters of a text"""
+    # One table lookup and bincount over the byte buffer instead of a Python
+    # loop per character; non-ASCII characters are dropped by the encode
+    codes = np.frombuffer(content.encode("ascii", "ignore"), dtype=np.uint8)
+    counts = np.bincount(ASCII_CLASS_TABLE[codes], minlength=len(ASCII_CLASS_NAMES))
+    return dict(zip(ASCII_CLASS_NAMES, counts.tolist()))
+
+class ContentFeatures(NamedTuple):
+    """Measurements of one draft, taken once and shared by the analysis helpers"""
+    lower: str
+    word_count: int
+    sentence_count: int
+    syllable_count: int
+    char_count: int
+    hashtag_count: int
+    mention_count: int
+    # Distinct characters, for question mark and emoji presence checks
+    chars: FrozenSet[str]
+    # Distinct DRAFT_KEYWORD_PATTERN keywords present, for word list checks
+    keywords: FrozenSet[str]
+
+def has_emoji(text: str) -> bool:
+    """Whether a text contains an emoji from EMOJI_PATTERN's ranges"""
+    # ASCII text can't contain one; isascii() settles most drafts without a regex scan
+    return not text.isascii() and EMOJI_PATTERN.search(text) is not None
+
+@functools.lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """Count syllables in a word (approximation)"""
+    # Cached per word: common words recur in every draft
+    word = word.lower()
+    vowels = "aeiouy"
+    syllable_count = 0
+    previous_was_vowel = False
+    
+    for char in word:
+        is_vowel = char in vowels
+        if is_vowel and not previous_was_vowel:
+            syllable_count += 1
+        previous_was_vowel = is_vowel
+    
+    # Handle silent e
+    if word.endswith('e'):
+        syllable_count -= 1
+    
+    return max(1, syllable_count)
+
+# Drafts are scored again when enhanced and when the intelligence layer runs,
+# so per-text analysis is memoized; results are immutable and safe to share
+@functools.lru_cache(maxsize=4096)
+def content_features(content: str) -> ContentFeatures:
+    """Count, split and lowercase a draft once for all the analysis helpers"""
+    words = content.split()
+    lower = content.lower()
+    return ContentFeatures(
+        lower=lower,
+        word_count=len(words),
+        sentence_count=len(SENTENCE_SPLIT_PATTERN.split(content)),
+        syllable_count=sum(count_syllables(word) for word in words),
+        char_count=len(content),
+        hashtag_count=content.count("#"),
+        mention_count=content.count("@"),
+        chars=frozenset(content),
+        keywords=frozenset(DRAFT_KEYWORD_PATTERN.findall(lower))
+    )
+
+@functools.lru_cache(maxsize=4096)
+def cta_matches(content: str) -> Tuple[str, ...]:
+    """Call-to-action words and phrases found in a text"""
+    return tuple(CTA_PATTERN.findall(content))
+
+# Private RNG for mock scores, so they don't share the global random state
+_RNG = random.Random()
+
+async def iter_paragraphs(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Yield the non-empty, blank-line separated paragraphs of streamed text as each completes"""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        # Only the unfinished last paragraph stays buffered
+        *paragraphs, buffer = buffer.split("\n\n")
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                yield paragraph.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+def llm_cache_key(prefix: str, model: str, temperature: float, payload: Any) -> str:
+    """Exact-match cache key for a deterministic-enough LLM request"""
+    digest = hashlib.sha256(
+        f"{model}:{temperature}:".encode() + orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    return f"llm:{prefix}:{digest}"
 
 class AIService:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
-        self.anthropic_client = Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        # One async client per provider for the process lifetime, so calls
+        # reuse pooled keep-alive connections (multiplexed over HTTP/2 for OpenAI)
+        # The SDKs are imported only when their key is configured; together
+        # they add most of a second to worker startup
+        self._http_client = None
+        self.openai_client = None
+        if settings.OPENAI_API_KEY:
+            import openai
+            
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+            self.openai_client = openai.AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=self._http_client
+            )
+        self.anthropic_client = None
+        if settings.ANTHROPIC_API_KEY:
+            from anthropic import AsyncAnthropic
+            
+            self.anthropic_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+        # Bulkhead shared by all outbound LLM calls, so traffic spikes queue
+        # here instead of piling onto provider rate limits
+        self._llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENT)
+        # Outstanding deduplicated LLM calls by request key
+        self._inflight_llm_calls: Dict[str, asyncio.Future] = {}
+        # Chat calls eligible for hedging, and how many were hedged
+        self._hedge_eligible_calls = 0
+        self._hedged_calls = 0
+        self._fitted_vectorizer = self._load_voice_vectorizer()
+        # Near-duplicate chat messages reuse the earlier LLM reply
+        self._chat_cache = SemanticResponseCache(threshold=0.95)
         
         # Content performance learning data
         self.performance_patterns = {
@@ -34,6 +381,31 @@ class AIService:
             }
         }
     
+    async def aclose(self):
+        """Close the provider clients' connection pools"""
+        if self.openai_client:
+            await self.openai_client.close()
+        if self.anthropic_client:
+            await self.anthropic_client.close()
+    
+    async def _llm_call(self, create, dedupe_key: Optional[str] = None, **kwargs):
+        """Call a provider SDK method once a bulkhead slot is free
+
+        Concurrent calls with the same dedupe_key share a single request and
+        its response object (callers parse it into their own dicts)
+        """
+        if dedupe_key is not None:
+            task = self._inflight_llm_calls.get(dedupe_key)
+            if task is None:
+                task = asyncio.ensure_future(self._llm_call(create, **kwargs))
+                self._inflight_llm_calls[dedupe_key] = task
+                task.add_done_callback(lambda _: self._inflight_llm_calls.pop(dedupe_key, None))
+            # Shielded so one caller's cancellation doesn't cancel the others' request
+            return await asyncio.shield(task)
+        
+        async with self._llm_semaphore:
+            return await create(**kwargs)
+    
     async def generate_content_drafts(
         self, 
         user_profile: Optional[Dict[str, Any]] = None,
@@ -63,16 +435,16 @@ class AIService:
                 # Enhanced mock generation with patterns
                 drafts_data = self._intelligent_mock_generation(count, platform, user_profile)
             
-            # Add intelligence layer to each draft
-            enhanced_drafts = []
-            for i, draft_data in enumerate(drafts_data):
-                enhanced_draft = await self._add_intelligence_layer(draft_data, user_profile, platform)
-                enhanced_drafts.append(enhanced_draft)
+            # Add intelligence layer to each draft; drafts are independent, so
+            # the layers run concurrently
+            enhanced_drafts = await asyncio.gather(
+                *(self._add_intelligence_layer(draft_data, user_profile, platform) for draft_data in drafts_data)
+            )
             
-            return enhanced_drafts
+            return list(enhanced_drafts)
             
-        except Exception as e:
-            print(f"Error generating content: {e}")
+        except Exception:
+            logger.exception("Error generating content")
             return self._intelligent_mock_generation(count, platform, user_profile)
     
     def _build_enhanced_context(self, user_profile: Dict[str, Any], performance_data: Dict[str, Any]) -> str:
@@ -102,12 +474,12 @@ class AIService:
         
         return base_context
     
-    def _create_intelligent_prompt(self, context: str, platform: str, performance_data: Dict[str, Any]) -> str:
+    def _create_intelligent_prompt(self, context: str, platform: str, performance_data: Dict[str, Any]) -> SystemPrompt:
         """Create AI prompt optimized for performance patterns"""
-        base_prompt = self._create_content_generation_prompt(context, platform)
+        preamble, context_block = self._create_content_generation_prompt(context, platform)
         
         if not performance_data:
-            return base_prompt
+            return preamble, context_block
         
         # Add performance-based instructions
         performance_instructions = []
@@ -121,10 +493,10 @@ class AIService:
             performance_instructions.append(f"Audience responds well to: {', '.join(prefs[:2])}")
         
         if performance_instructions:
-            enhanced_prompt = f"{base_prompt}\n\nPerformance Optimization:\n{chr(10).join(f'- {inst}' for inst in performance_instructions)}"
-            return enhanced_prompt
+            # Per-user instructions go with the context, after the cacheable preamble
+            context_block = f"{context_block}\n\nPerformance Optimization:\n{chr(10).join(f'- {inst}' for inst in performance_instructions)}"
         
-        return base_prompt
+        return preamble, context_block
     
     def _optimize_user_prompt(self, prompt: str, user_profile: Dict[str, Any]) -> str:
         """Optimize user prompt based on profile and goals"""
@@ -142,8 +514,11 @@ class AIService:
         
         return prompt
     
-    async def _generate_with_ai(self, system_prompt: str, user_prompt: str, count: int) -> List[str]:
-        """Generate content using available AI services with fallback"""
+    async def _generate_with_ai(self, system_prompt: SystemPrompt, user_prompt: str, count: int) -> List[Dict[str, Any]]:
+        """Generate content using available AI services with fallback
+
+        Each draft has "content", plus "variants" and "themes" when the provider supplied them
+        """
         try:
             if self.openai_client:
                 return await self._generate_with_openai(system_prompt, user_prompt, count)
@@ -151,43 +526,71 @@ class AIService:
                 return await self._generate_with_anthropic(system_prompt, user_prompt, count)
             else:
                 return []
-        except Exception as e:
-            print(f"Error in AI generation: {e}")
+        except Exception:
+            logger.exception("Error in AI generation")
             return []
     
-    async def _generate_with_anthropic(self, system_prompt: str, user_prompt: str, count: int) -> List[str]:
-        """Generate content using Anthropic Claude"""
+    async def _generate_with_anthropic(self, system_prompt: SystemPrompt, user_prompt: str, count: int) -> List[Dict[str, Any]]:
+        """Generate content using Anthropic Claude, streamed and cut off after count posts"""
+        posts = []
         try:
-            response = await self.anthropic_client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1000,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": f"Generate {count} different posts about: {user_prompt}"}
-                ]
-            )
+            async with self._llm_semaphore:
+                stream = await self.anthropic_client.messages.create(
+                    model="claude-3-sonnet-20240229",
+                    max_tokens=1000,
+                    system=self._anthropic_system_blocks(system_prompt),
+                    messages=[
+                        {"role": "user", "content": f"Generate {count} different posts about: {user_prompt}"}
+                    ],
+                    stream=True
+                )
+                try:
+                    async with aclosing(iter_paragraphs(self._anthropic_text_deltas(stream))) as paragraphs:
+                        async for post in paragraphs:
+                            posts.append({"content": post})
+                            if len(posts) == count:
+                                break
+                finally:
+                    # Closing the connection early stops generating unused output
+                    await stream.response.aclose()
             
-            content = response.content[0].text
-            posts = [post.strip() for post in content.split('\n\n') if post.strip()]
-            return posts[:count]
+            return posts
             
-        except Exception as e:
-            print(f"Error with Anthropic: {e}")
+        except Exception:
+            logger.exception("Error with Anthropic")
             return []
     
-    async def _enhance_generated_content(self, base_content: List[str], user_profile: Dict[str, Any], platform: str) -> List[Dict[str, Any]]:
+    async def _anthropic_text_deltas(self, stream) -> AsyncIterator[str]:
+        """Text deltas from an Anthropic Messages event stream"""
+        async for event in stream:
+            if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                yield event.delta.text
+    
+    async def _enhance_generated_content(self, base_content: List[Dict[str, Any]], user_profile: Dict[str, Any], platform: str) -> List[Dict[str, Any]]:
         """Enhance generated content with additional intelligence"""
         enhanced_content = []
-        
-        for i, content in enumerate(base_content):
-            # Generate variants for first few posts
-            variants = await self._generate_intelligent_variants(content, user_profile) if i < 3 else None
-            
-            # Calculate performance predictions
-            performance_score = self._predict_performance(content, user_profile, platform)
-            
-            # Extract and enhance themes
-            themes = self._extract_intelligent_themes(content, user_profile)
+        contents = [draft["content"] for draft in base_content]
+        
+        # Variants for the first few posts, unless the model already returned
+        # them, generated concurrently across drafts
+        all_variants = [draft.get("variants") if i < 3 else None for i, draft in enumerate(base_content)]
+        missing_variants = [i for i, variants in enumerate(all_variants[:3]) if variants is None]
+        results = await asyncio.gather(
+            *(self._generate_intelligent_variants(contents[i], user_profile) for i in missing_variants)
+        )
+        for i, variants in zip(missing_variants, results):
+            all_variants[i] = variants
+        moderation_statuses = [self._moderate_content(content) for content in contents]
+        
+        # Performance predictions for the whole batch at once
+        all_features = [content_features(content) for content in contents]
+        performance_scores = self._predict_performance_batch(all_features, user_profile, platform)
+        
+        for draft, content, features, variants, moderation_status, performance_score in zip(
+            base_content, contents, all_features, all_variants, moderation_statuses, performance_scores
+        ):
+            # Model-provided themes, else keyword matching
+            themes = draft.get("themes") or self._extract_intelligent_themes(content, user_profile, features.lower)
             
             # Generate posting recommendations
             posting_recommendations = self._generate_posting_recommendations(content, themes, user_profile)
@@ -198,10 +601,10 @@ class AIService:
                 "variants": variants,
                 "best_time_score": performance_score,
                 "themes": themes,
-                "moderation_status": await self._moderate_content(content),
+                "moderation_status": moderation_status,
                 "posting_recommendations": posting_recommendations,
-                "engagement_prediction": self._predict_engagement(content, user_profile),
-                "optimization_suggestions": self._suggest_optimizations(content, user_profile)
+                "engagement_prediction": self._predict_engagement(features, user_profile),
+                "optimization_suggestions": self._suggest_optimizations(features, user_profile)
             }
             
             enhanced_content.append(enhanced_draft)
@@ -221,44 +624,33 @@ class AIService:
         is_punchy = tone.get("punchy", 50) > 60
         is_formal = tone.get("formal", 50) > 60
         
-        # Enhanced content templates based on themes and goals
-        content_templates = {
-            "AI": [
-                "🤖 {punchy}AI is transforming {theme} in ways we never imagined. Here's what I learned building with AI for the past month:{formal}",
-                "{question}What if AI could {goal_action}? {insight} {hashtags}",
-                "{statistic} of companies are already using AI for {theme}. Are you ready for what's next? {hashtags}"
-            ],
-            "productivity": [
-                "⚡ {punchy}Stop doing these 3 things that kill your productivity:{formal} {list_items} {hashtags}",
-                "{insight} about productivity: {tip}. Try this for one week and see the difference. {hashtags}",
-                "Productivity hack: {specific_technique}. {result_claim} {hashtags}"
-            ],
-            "strategy": [
-                "🎯 {punchy}Your {goal} strategy is missing this crucial element:{formal} {strategic_insight} {hashtags}",
-                "{contrarian_take} about {theme} strategy. Here's why everyone gets it wrong: {explanation} {hashtags}",
-                "Strategy lesson from {example}: {lesson} {application} {hashtags}"
-            ]
-        }
+        # Mock metrics for every draft at once, as plain ints for serialization
+        index = np.arange(count)
+        performance_scores = (75 + index * 3 + (10 if is_punchy else 0)).tolist()
+        metrics = zip(
+            (50 + index * 10).tolist(),
+            (5 + index * 2).tolist(),
+            (3 + index).tolist(),
+            (1000 + index * 200).tolist()
+        )
         
         mock_drafts = []
-        for i in range(count):
+        for i, performance_score, (likes, shares, comments, reach_estimate) in zip(range(count), performance_scores, metrics):
             # Select theme and template
             theme = themes[i % len(themes)]
             goal = goals[i % len(goals)]
             
-            templates = content_templates.get(theme, content_templates["AI"])
+            templates = MOCK_CONTENT_TEMPLATES.get(theme, MOCK_CONTENT_TEMPLATES["AI"])
             template = templates[i % len(templates)]
             
             # Fill template with personalized content
             content = self._fill_content_template(template, theme, goal, tone, platform)
             
-            # Calculate mock metrics
-            performance_score = 75 + (i * 3) + (10 if is_punchy else 0)
             engagement_prediction = {
-                "likes": 50 + (i * 10),
-                "shares": 5 + (i * 2),
-                "comments": 3 + i,
-                "reach_estimate": 1000 + (i * 200)
+                "likes": likes,
+                "shares": shares,
+                "comments": comments,
+                "reach_estimate": reach_estimate
             }
             
             mock_draft = {
@@ -287,8 +679,8 @@ class AIService:
         is_formal = tone.get("formal", 50) > 60
         is_contrarian = tone.get("contrarian", 50) > 50
         
-        # Content components
-        components = {
+        # Per-call components, layered over the static ones without copying them
+        components = ChainMap({
             "{punchy}": "🚀 " if is_punchy else "",
             "{formal}": " Furthermore, this approach demonstrates significant value." if is_formal else "",
             "{theme}": theme,
@@ -297,27 +689,17 @@ class AIService:
             "{question}": "🤔 " if is_punchy else "",
             "{insight}": f"Here's what 3 years of {theme} taught me:",
             "{hashtags}": f"#{theme.replace(' ', '')} #innovation #productivity",
-            "{statistic}": "73%",
-            "{list_items}": "\n1. Multitasking (it doesn't work)\n2. Checking email every 5 minutes\n3. Not setting clear priorities",
-            "{tip}": "focus on systems, not goals",
-            "{result_claim}": "Increased my output by 40%",
-            "{specific_technique}": "the 2-minute rule",
             "{contrarian_take}": "Unpopular opinion:" if is_contrarian else "Hot take:",
             "{strategic_insight}": f"understanding your audience's real needs in {theme}",
-            "{explanation}": "they focus on tactics instead of fundamentals",
-            "{example}": "Apple's product launches",
-            "{lesson}": "simplicity beats complexity every time",
             "{application}": f"Apply this to your {goal} strategy."
-        }
+        }, STATIC_TEMPLATE_COMPONENTS)
         
-        # Replace placeholders
-        content = template
-        for placeholder, value in components.items():
-            content = content.replace(placeholder, value)
+        # Replace placeholders in one pass; unknown ones are left as is
+        content = TEMPLATE_PLACEHOLDER_PATTERN.sub(lambda m: components.get(m.group(), m.group()), template)
         
         # Platform-specific adjustments
         if platform == "linkedin":
-            content = content.replace("🚀", "")  # Less emojis for LinkedIn
+            content = content.translate(LINKEDIN_EMOJI_STRIP)  # Less emojis for LinkedIn
             if not content.endswith("."):
                 content += "."
         elif platform == "twitter":
@@ -330,9 +712,9 @@ class AIService:
     def _create_variant(self, original: str, variant_num: int) -> str:
         """Create intelligent variants of content"""
         variants_strategies = [
-            lambda x: x.replace("🚀", "✨").replace("!", "."),  # Tone down
+            lambda x: x.translate(TONE_DOWN_TRANSLATION),  # Tone down
             lambda x: x.replace("Here's", "This is").replace("?", "."),  # More declarative
-            lambda x: re.sub(r'(\d+)%', lambda m: f"{int(m.group(1))+5}%", x),  # Adjust stats
+            lambda x: PERCENTAGE_PATTERN.sub(lambda m: f"{int(m.group(1))+5}%", x),  # Adjust stats
         ]
         
         if variant_num < len(variants_strategies):
@@ -343,51 +725,52 @@ class AIService:
     async def _add_intelligence_layer(self, draft_data: Dict[str, Any], user_profile: Dict[str, Any], platform: str) -> Dict[str, Any]:
         """Add intelligence layer to draft"""
         content = draft_data["content"]
+        # One pass of counting and splitting shared by the analyzers below
+        features = content_features(content)
         
         # Add intelligent analysis
         draft_data.update({
-            "readability_score": self._calculate_readability(content),
-            "sentiment_score": self._analyze_sentiment(content),
+            "readability_score": self._calculate_readability(features),
+            "sentiment_score": self._analyze_sentiment(features),
             "hook_strength": self._analyze_hook_strength(content),
             "call_to_action": self._detect_cta(content),
-            "platform_optimization": self._get_platform_optimization(content, platform),
-            "personalization_score": self._calculate_personalization(content, user_profile)
+            "platform_optimization": self._get_platform_optimization(content, platform, features),
+            "personalization_score": self._calculate_personalization(content, user_profile, features)
         })
         
         return draft_data
     
-    def _predict_performance(self, content: str, user_profile: Dict[str, Any], platform: str) -> float:
-        """Predict content performance score"""
-        base_score = 70
+    def _predict_performance_batch(self, features: List[ContentFeatures], user_profile: Dict[str, Any], platform: str) -> List[float]:
+        """Predict performance scores for a batch of drafts, one numpy expression per signal"""
+        count = len(features)
+        word_counts = np.fromiter((f.word_count for f in features), dtype=np.int64, count=count)
+        scores = np.full(count, 70)
         
         # Content length optimization
-        word_count = len(content.split())
-        if platform == "twitter" and 15 <= word_count <= 25:
-            base_score += 10
-        elif platform == "linkedin" and 50 <= word_count <= 150:
-            base_score += 10
+        if platform == "twitter":
+            scores += 10 * ((word_counts >= 15) & (word_counts <= 25))
+        elif platform == "linkedin":
+            scores += 10 * ((word_counts >= 50) & (word_counts <= 150))
         
         # Engagement indicators
-        if "?" in content:
-            base_score += 5  # Questions drive engagement
-        if any(emoji in content for emoji in "🚀✨💡🎯⚡"):
-            base_score += 3  # Visual elements
-        if content.count("#") >= 2:
-            base_score += 4  # Hashtags
+        has_question = np.fromiter(("?" in f.chars for f in features), dtype=bool, count=count)
+        has_visual = np.fromiter((not f.chars.isdisjoint("🚀✨💡🎯⚡") for f in features), dtype=bool, count=count)
+        hashtag_counts = np.fromiter((f.hashtag_count for f in features), dtype=np.int64, count=count)
+        scores += 5 * has_question  # Questions drive engagement
+        scores += 3 * has_visual  # Visual elements
+        scores += 4 * (hashtag_counts >= 2)  # Hashtags
         
         # Theme alignment
         if user_profile and user_profile.get("themes"):
-            themes = user_profile["themes"]
-            content_lower = content.lower()
-            for theme in themes:
-                if theme.lower() in content_lower:
-                    base_score += 8
-                    break
+            themes = [theme.lower() for theme in user_profile["themes"]]
+            on_theme = np.fromiter((any(theme in f.lower for theme in themes) for f in features), dtype=bool, count=count)
+            scores += 8 * on_theme
         
-        return min(95, max(60, base_score))
+        return np.clip(scores, 60, 95).tolist()
     
-    async def _moderate_content(self, content: str) -> str:
+    def _moderate_content(self, content: str) -> str:
         """Enhanced content moderation"""
+        # Local checks only; make this async again if it ever calls a moderation API
         # Basic keyword filtering
         flagged_words = ["hate", "violence", "spam", "scam"]
         
@@ -399,7 +782,7 @@ class AIService:
             return "flagged"  # Too short
         
         # Check for excessive caps or exclamation marks
-        caps_ratio = sum(1 for c in content if c.isupper()) / len(content)
+        caps_ratio = ascii_char_counts(content)["upper"] / len(content)
         if caps_ratio > 0.3:
             return "flagged"  # Too shouty
         
@@ -421,11 +804,11 @@ class AIService:
         return suggestions[:3]
     
     # Add the missing helper methods
-    def _calculate_readability(self, content: str) -> float:
+    def _calculate_readability(self, features: ContentFeatures) -> float:
         """Calculate readability score (Flesch-Kincaid inspired)"""
-        sentences = len(re.split(r'[.!?]+', content))
-        words = len(content.split())
-        syllables = sum([self._count_syllables(word) for word in content.split()])
+        sentences = features.sentence_count
+        words = features.word_count
+        syllables = features.syllable_count
         
         if sentences == 0 or words == 0:
             return 50.0
@@ -438,34 +821,11 @@ class AIService:
         score = 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables)
         return max(0, min(100, score))
     
-    def _count_syllables(self, word: str) -> int:
-        """Count syllables in a word (approximation)"""
-        word = word.lower()
-        vowels = "aeiouy"
-        syllable_count = 0
-        previous_was_vowel = False
-        
-        for char in word:
-            is_vowel = char in vowels
-            if is_vowel and not previous_was_vowel:
-                syllable_count += 1
-            previous_was_vowel = is_vowel
-        
-        # Handle silent e
-        if word.endswith('e'):
-            syllable_count -= 1
-        
-        return max(1, syllable_count)
-    
-    def _analyze_sentiment(self, content: str) -> Dict[str, float]:
+    def _analyze_sentiment(self, features: ContentFeatures) -> Dict[str, float]:
         """Analyze sentiment of content"""
-        positive_words = ["great", "amazing", "awesome", "fantastic", "excellent", "love", "happy", "excited", "brilliant", "wonderful"]
-        negative_words = ["bad", "terrible", "awful", "hate", "sad", "disappointed", "frustrated", "angry", "horrible", "worst"]
-        
-        content_lower = content.lower()
-        positive_score = sum(1 for word in positive_words if word in content_lower)
-        negative_score = sum(1 for word in negative_words if word in content_lower)
-        total_words = len(content.split())
+        positive_score = len(features.keywords & POSITIVE_WORDS)
+        negative_score = len(features.keywords & NEGATIVE_WORDS)
+        total_words = features.word_count
         
         return {
             "positive": positive_score / max(total_words, 1) * 100,
@@ -477,14 +837,15 @@ class AIService:
         """Analyze the strength of the content hook"""
         first_sentence = content.split('.')[0] if '.' in content else content
         first_sentence = first_sentence.strip()
+        first_sentence_lower = first_sentence.lower()
         
         hook_indicators = {
             "question": "?" in first_sentence,
-            "statistic": bool(re.search(r'\d+%|\d+\s*(percent|x|times)', first_sentence)),
-            "emoji": bool(re.search(r'[😀-🙿🌀-🗿🚀-🛿🇦-🇿]', first_sentence)),
-            "power_words": any(word in first_sentence.lower() for word in ["secret", "surprising", "shocking", "revealed", "exposed"]),
-            "urgency": any(word in first_sentence.lower() for word in ["now", "today", "urgent", "limited", "only"]),
-            "curiosity": any(phrase in first_sentence.lower() for phrase in ["what if", "imagine if", "here's why", "the reason"])
+            "statistic": bool(STATISTIC_PATTERN.search(first_sentence)),
+            "emoji": has_emoji(first_sentence),
+            "power_words": any(word in first_sentence_lower for word in HOOK_POWER_WORDS),
+            "urgency": any(word in first_sentence_lower for word in HOOK_URGENCY_WORDS),
+            "curiosity": any(phrase in first_sentence_lower for phrase in HOOK_CURIOSITY_PHRASES)
         }
         
         strength_score = sum(hook_indicators.values()) * 20  # Max 100
@@ -497,16 +858,7 @@ class AIService:
     
     def _detect_cta(self, content: str) -> Dict[str, Any]:
         """Detect call-to-action in content"""
-        cta_patterns = [
-            r"\b(follow|like|share|comment|subscribe|join|try|get|download|learn|discover|start)\b",
-            r"\b(click|tap|swipe|visit|check out)\b",
-            r"\b(what do you think|thoughts|opinions|agree)\b"
-        ]
-        
-        cta_found = []
-        for pattern in cta_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            cta_found.extend(matches)
+        cta_found = cta_matches(content)
         
         return {
             "has_cta": len(cta_found) > 0,
@@ -514,37 +866,38 @@ class AIService:
             "cta_words": list(set(cta_found))
         }
     
-    def _get_platform_optimization(self, content: str, platform: str) -> Dict[str, Any]:
+    def _get_platform_optimization(self, content: str, platform: str, features: ContentFeatures) -> Dict[str, Any]:
         """Get platform-specific optimization scores"""
         optimizations = {}
         
         if platform == "twitter":
-            char_count = len(content)
+            char_count = features.char_count
             optimizations = {
                 "length_score": 100 if char_count <= 280 else max(0, 100 - (char_count - 280) * 2),
-                "hashtag_count": content.count("#"),
-                "mention_count": content.count("@"),
+                "hashtag_count": features.hashtag_count,
+                "mention_count": features.mention_count,
                 "media_suggested": char_count < 200,  # Room for media
                 "thread_potential": char_count > 240
             }
         
         elif platform == "linkedin":
-            word_count = len(content.split())
+            word_count = features.word_count
             optimizations = {
                 "length_score": 100 if 50 <= word_count <= 200 else max(0, 100 - abs(word_count - 125) * 2),
-                "professionalism_score": 90 if not any(emoji in content for emoji in "😀😂🤣") else 70,
-                "hashtag_count": content.count("#"),
+                "professionalism_score": 90 if features.chars.isdisjoint("😀😂🤣") else 70,
+                "hashtag_count": features.hashtag_count,
                 "paragraph_count": len([p for p in content.split('\n\n') if p.strip()]),
-                "engagement_words": sum(1 for word in ["insights", "thoughts", "experience", "learned"] if word in content.lower())
+                "engagement_words": len(features.keywords & ENGAGEMENT_WORDS)
             }
         
         return optimizations
     
-    def _calculate_personalization(self, content: str, user_profile: Dict[str, Any]) -> float:
+    def _calculate_personalization(self, content: str, user_profile: Dict[str, Any], features: ContentFeatures) -> float:
         """Calculate how well content matches user profile"""
         if not user_profile:
             return 50.0
         
+        content_lower = features.lower
         score = 0
         max_score = 0
         
@@ -552,7 +905,6 @@ class AIService:
         themes = user_profile.get("themes", [])
         if themes:
             max_score += 30
-            content_lower = content.lower()
             theme_matches = sum(1 for theme in themes if theme.lower() in content_lower)
             score += (theme_matches / len(themes)) * 30
         
@@ -560,16 +912,9 @@ class AIService:
         goals = user_profile.get("goals", [])
         if goals:
             max_score += 20
-            goal_keywords = {
-                "grow audience": ["audience", "followers", "reach", "growth"],
-                "thought leadership": ["insights", "experience", "opinion", "perspective"],
-                "engagement": ["comment", "share", "thoughts", "discussion"]
-            }
-            
             for goal in goals:
-                if goal in goal_keywords:
-                    keywords = goal_keywords[goal]
-                    if any(keyword in content.lower() for keyword in keywords):
+                if goal in GOAL_KEYWORDS:
+                    if not features.keywords.isdisjoint(GOAL_KEYWORDS[goal]):
                         score += 20 / len(goals)
         
         # Check voice alignment
@@ -579,11 +924,11 @@ class AIService:
             tone = voice_profile.get("tone", {})
             
             # Simple tone matching
-            if tone.get("punchy", 0) > 60 and ("!" in content or any(emoji in content for emoji in "🚀⚡✨")):
+            if tone.get("punchy", 0) > 60 and not features.chars.isdisjoint("!🚀⚡✨"):
                 score += 15
-            if tone.get("formal", 0) > 60 and not any(emoji in content for emoji in "😀😂🤣😍"):
+            if tone.get("formal", 0) > 60 and features.chars.isdisjoint("😀😂🤣😍"):
                 score += 15
-            if tone.get("contrarian", 0) > 60 and any(phrase in content.lower() for phrase in ["unpopular", "controversial", "disagree"]):
+            if tone.get("contrarian", 0) > 60 and not features.keywords.isdisjoint(CONTRARIAN_PHRASES):
                 score += 20
         
         return (score / max(max_score, 1)) * 100 if max_score > 0 else 50.0
@@ -598,7 +943,7 @@ class AIService:
             
             # More formal variant
             if tone.get("formal", 0) < 60:
-                formal_variant = content.replace("!", ".").replace("🚀", "").replace("amazing", "significant")
+                formal_variant = content.translate(FORMAL_TRANSLATION).replace("amazing", "significant")
                 variants.append(formal_variant)
             
             # More punchy variant
@@ -617,10 +962,10 @@ class AIService:
         
         return variants[:3]
     
-    def _extract_intelligent_themes(self, content: str, user_profile: Dict[str, Any]) -> List[str]:
+    def _extract_intelligent_themes(self, content: str, user_profile: Dict[str, Any], content_lower: Optional[str] = None) -> List[str]:
         """Extract themes using intelligent matching"""
         themes = []
-        content_lower = content.lower()
+        content_lower = content_lower or content.lower()
         
         # User profile themes first
         if user_profile and user_profile.get("themes"):
@@ -628,22 +973,10 @@ class AIService:
                 if theme.lower() in content_lower:
                     themes.append(theme)
         
-        # AI/Technology themes
-        ai_keywords = ["ai", "artificial intelligence", "machine learning", "automation", "technology", "innovation"]
-        if any(keyword in content_lower for keyword in ai_keywords):
-            themes.append("AI & Technology")
-        
-        # Business themes
-        business_keywords = ["strategy", "business", "growth", "marketing", "sales", "leadership"]
-        if any(keyword in content_lower for keyword in business_keywords):
-            themes.append("Business Strategy")
+        # AI/Technology, business and productivity themes in one scan
+        themes.extend(match_content_themes(content))
         
-        # Productivity themes
-        productivity_keywords = ["productivity", "efficiency", "time management", "workflow", "organization"]
-        if any(keyword in content_lower for keyword in productivity_keywords):
-            themes.append("Productivity")
-        
-        return list(set(themes))[:3]
+        return list(dict.fromkeys(themes))[:3]
     
     def _generate_posting_recommendations(self, content: str, themes: List[str], user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """Generate intelligent posting recommendations"""
@@ -669,18 +1002,18 @@ class AIService:
         
         return recommendations
     
-    def _predict_engagement(self, content: str, user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def _predict_engagement(self, features: ContentFeatures, user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """Predict engagement metrics"""
         base_likes = 50
         base_shares = 5
         base_comments = 3
         
         # Boost based on content features
-        if "?" in content:
+        if "?" in features.chars:
             base_comments += 5
-        if any(emoji in content for emoji in "🚀⚡✨"):
+        if not features.chars.isdisjoint("🚀⚡✨"):
             base_likes += 20
-        if "#" in content:
+        if features.hashtag_count:
             base_likes += 10
         
         # User profile influence
@@ -697,26 +1030,26 @@ class AIService:
             "reach_estimate": base_likes * 20
         }
     
-    def _suggest_optimizations(self, content: str, user_profile: Dict[str, Any]) -> List[str]:
+    def _suggest_optimizations(self, features: ContentFeatures, user_profile: Dict[str, Any]) -> List[str]:
         """Suggest content optimizations"""
         suggestions = []
         
         # Length optimization
-        word_count = len(content.split())
+        word_count = features.word_count
         if word_count > 50:
             suggestions.append("Consider shortening for better engagement")
         elif word_count < 15:
             suggestions.append("Add more context for better value")
         
         # Engagement optimization
-        if "?" not in content:
+        if "?" not in features.chars:
             suggestions.append("Add a question to increase comments")
         
-        if "#" not in content:
+        if not features.hashtag_count:
             suggestions.append("Add relevant hashtags for discoverability")
         
         # Visual optimization
-        if not any(emoji in content for emoji in "🚀⚡✨💡🎯"):
+        if features.chars.isdisjoint("🚀⚡✨💡🎯"):
             suggestions.append("Consider adding relevant emojis")
         
         return suggestions[:3]
@@ -724,31 +1057,113 @@ class AIService:
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
-        user_profile: Optional[Dict[str, Any]] = None
+        user_profile: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Generate AI chat response with potential actions"""
+        """Generate AI chat response with potential actions
+
+        Replies are only cached when user_id is given, and only reused for that user
+        """
         
         context = self._build_user_context(user_profile)
         system_prompt = self._create_chat_system_prompt(context)
+        use_cache = self.openai_client is not None and user_id is not None
         
         try:
+            if use_cache:
+                cache_scope = self._chat_cache_scope(user_id, context, messages)
+                query_vector = self._chat_cache.embed(messages[-1]["content"])
+                cached = self._chat_cache.lookup(cache_scope, query_vector)
+                if cached is not None:
+                    return cached
+            
             if self.openai_client:
-                response = await self._chat_with_openai(system_prompt, messages)
+                response = await self._chat_with_hedging(system_prompt, messages)
             else:
                 response = self._mock_chat_response(messages[-1]["content"])
             
             # Parse response for actions
             actions = self._extract_actions(response["content"])
             
-            return {
+            result = {
                 "content": response["content"],
                 "actions": actions
             }
+            if use_cache:
+                self._chat_cache.store(cache_scope, query_vector, result)
             
-        except Exception as e:
-            print(f"Error in chat completion: {e}")
+            return result
+            
+        except Exception:
+            logger.exception("Error in chat completion")
             return self._mock_chat_response(messages[-1]["content"])
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        user_profile: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an AI chat response
+
+        Yields {"delta": text} as the reply is generated, then the complete
+        {"content", "actions"} reply (actions need the full text). Replies are
+        cached per user_id, as in chat_completion
+        """
+        context = self._build_user_context(user_profile)
+        system_prompt = self._create_chat_system_prompt(context)
+        
+        if not self.openai_client:
+            content = self._mock_chat_response(messages[-1]["content"])["content"]
+            yield {"delta": content}
+            yield {"content": content, "actions": self._extract_actions(content)}
+            return
+        
+        use_cache = user_id is not None
+        if use_cache:
+            cache_scope = self._chat_cache_scope(user_id, context, messages)
+            query_vector = self._chat_cache.embed(messages[-1]["content"])
+            cached = self._chat_cache.lookup(cache_scope, query_vector)
+            if cached is not None:
+                yield {"delta": cached["content"]}
+                yield cached
+                return
+        
+        chunks = []
+        try:
+            async for delta in self._stream_chat_with_openai(system_prompt, messages):
+                chunks.append(delta)
+                yield {"delta": delta}
+        except Exception:
+            # Nothing sent yet: fall back like chat_completion; otherwise the
+            # partial reply can't be completed
+            if chunks:
+                raise
+            logger.exception("Error in streaming chat completion")
+            content = self._mock_chat_response(messages[-1]["content"])["content"]
+            yield {"delta": content}
+            yield {"content": content, "actions": self._extract_actions(content)}
+            return
+        
+        content = "".join(chunks)
+        result = {
+            "content": content,
+            "actions": self._extract_actions(content)
+        }
+        if use_cache:
+            self._chat_cache.store(cache_scope, query_vector, result)
+        yield result
+    
+    def _chat_cache_scope(self, user_id: int, context: str, messages: List[Dict[str, str]]) -> str:
+        """Semantic cache scope: the user, their context and the assistant turn being replied to"""
+        # The user id keeps replies from being served to anyone else, even when
+        # profiles (and so contexts) are identical. Without the previous reply,
+        # a short answer like "yes" would match across conversations
+        previous_reply = next(
+            (m["content"] for m in reversed(messages[:-1]) if m["role"] == "assistant"), ""
+        )
+        return hashlib.sha256(f"{user_id}\x00{context}\x00{previous_reply}".encode()).hexdigest()
+    
     async def analyze_voice_samples(self, samples: List[str], user_id: str = None) -> Dict[str, Any]:
         """Enhanced voice analysis with multiple techniques"""
         
@@ -757,9 +1172,16 @@ class AIService:
         
         try:
             # Combine all techniques for comprehensive analysis
-            linguistic_analysis = self._analyze_linguistic_patterns(samples)
-            stylistic_analysis = self._analyze_stylistic_patterns(samples)
-            ai_analysis = await self._ai_voice_analysis(samples)
+            if sum(map(len, samples)) > VOICE_OFFLOAD_THRESHOLD:
+                # Regex scans over large batches would hold the event loop for
+                # milliseconds; run them in a thread, overlapping the LLM call
+                (linguistic_analysis, stylistic_analysis), ai_analysis = await asyncio.gather(
+                    asyncio.to_thread(self._analyze_text_patterns, samples),
+                    self._ai_voice_analysis(samples)
+                )
+            else:
+                linguistic_analysis, stylistic_analysis = self._analyze_text_patterns(samples)
+                ai_analysis = await self._ai_voice_analysis(samples)
             
             # Create voice embedding
             voice_embedding = self._create_voice_embedding(samples)
@@ -785,15 +1207,19 @@ class AIService:
             
             return combined_analysis
             
-        except Exception as e:
-            print(f"Error in comprehensive voice analysis: {e}")
+        except Exception:
+            logger.exception("Error in comprehensive voice analysis")
             # Enhanced fallback with sample analysis
             return self._fallback_voice_analysis(samples)
     
+    def _analyze_text_patterns(self, samples: List[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Linguistic and stylistic analysis; pure functions of the samples, safe to run in a thread"""
+        return self._analyze_linguistic_patterns(samples), self._analyze_stylistic_patterns(samples)
+    
     def _analyze_linguistic_patterns(self, samples: List[str]) -> Dict[str, Any]:
         """Analyze linguistic patterns in writing samples"""
         combined_text = " ".join(samples)
-        sentences = re.split(r'[.!?]+', combined_text)
+        sentences = SENTENCE_SPLIT_PATTERN.split(combined_text)
         sentences = [s.strip() for s in sentences if s.strip()]
         
         # Sentence length analysis
@@ -801,11 +1227,12 @@ class AIService:
         avg_sentence_length = np.mean(sentence_lengths) if sentence_lengths else 0
         
         # Word complexity analysis
-        complex_words = re.findall(r'\b\w{8,}\b', combined_text.lower())
+        combined_lower = combined_text.lower()
+        complex_words = LONG_WORD_PATTERN.findall(combined_lower)
         complexity_score = len(complex_words) / max(len(combined_text.split()), 1) * 100
         
         # Extract key vocabulary
-        words = re.findall(r'\b\w+\b', combined_text.lower())
+        words = WORD_PATTERN.findall(combined_lower)
         word_freq = {}
         for word in words:
             if len(word) > 3:  # Skip short words
@@ -829,19 +1256,13 @@ class AIService:
         # Punctuation patterns
         exclamation_count = combined_text.count('!')
         question_count = combined_text.count('?')
-        emoji_pattern = re.compile(r'[😀-🙿🌀-🗿🚀-🛿🇦-🇿]+')
-        emoji_count = len(emoji_pattern.findall(combined_text))
+        emoji_count = 0 if combined_text.isascii() else len(EMOJI_PATTERN.findall(combined_text))
         
         # Emotional indicators
-        emotion_words = {
-            "positive": ["amazing", "fantastic", "great", "awesome", "love", "excited", "brilliant"],
-            "negative": ["terrible", "awful", "hate", "disappointed", "frustrated", "angry"],
-            "neutral": ["okay", "fine", "decent", "average", "normal"]
-        }
-        
+        combined_lower = combined_text.lower()
         emotion_scores = {}
-        for emotion, words in emotion_words.items():
-            score = sum(1 for word in words if word in combined_text.lower())
+        for emotion, words in EMOTION_WORDS.items():
+            score = sum(1 for word in words if word in combined_lower)
             emotion_scores[emotion] = score
         
         # Determine dominant emotion
@@ -910,17 +1331,30 @@ class AIService:
         
         try:
             if self.openai_client:
-                response = await self.openai_client.chat.completions.create(
-                    model="gpt-4" if "gpt-4" in str(settings.OPENAI_API_KEY) else "gpt-3.5-turbo",
+                model = "gpt-4" if "gpt-4" in str(settings.OPENAI_API_KEY) else "gpt-3.5-turbo"
+                cache_key = llm_cache_key("voice", model, VOICE_ANALYSIS_TEMPERATURE, samples)
+                # Sync client in a thread: this also runs in Celery workers, on
+                # run_async()'s persistent per-process loop, and the async Redis
+                # pool's connections belong to whichever loop opened them
+                cached = await asyncio.to_thread(cache_get_sync, cache_key)
+                if cached is not None:
+                    return cached
+                
+                response = await self._llm_call(
+                    self.openai_client.chat.completions.create,
+                    dedupe_key=cache_key,
+                    model=model,
                     messages=[{"role": "user", "content": prompt}],
-                    temperature=0.2
+                    temperature=VOICE_ANALYSIS_TEMPERATURE
                 )
                 
                 content = response.choices[0].message.content
                 # Extract JSON from response
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
+                json_match = JSON_OBJECT_PATTERN.search(content)
                 if json_match:
-                    return json.loads(json_match.group())
+                    analysis = orjson.loads(json_match.group())
+                    await asyncio.to_thread(cache_set_sync, cache_key, analysis, VOICE_ANALYSIS_CACHE_TTL)
+                    return analysis
                     
             # Fallback analysis
             return {
@@ -936,8 +1370,8 @@ class AIService:
                 "confidence": 0.75
             }
             
-        except Exception as e:
-            print(f"Error in AI voice analysis: {e}")
+        except Exception:
+            logger.exception("Error in AI voice analysis")
             return {"error": "AI analysis failed"}
     
     def _create_voice_embedding(self, samples: List[str]) -> List[float]:
@@ -945,13 +1379,12 @@ class AIService:
         try:
             combined_text = " ".join(samples)
             
-            # Use TF-IDF for basic embedding
-            if hasattr(self, '_fitted_vectorizer'):
+            # Never fitted on request samples: that would make one user's
+            # writing the vocabulary every later embedding is built from
+            if self._fitted_vectorizer is not None:
                 vector = self._fitted_vectorizer.transform([combined_text])
             else:
-                # Fit on current samples (in production, use pre-trained embeddings)
-                vector = self.tfidf_vectorizer.fit_transform([combined_text])
-                self._fitted_vectorizer = self.tfidf_vectorizer
+                vector = self.voice_hashing_vectorizer.transform([combined_text])
             
             # Convert to dense array and then to list
             embedding = vector.toarray()[0].tolist()
@@ -964,12 +1397,39 @@ class AIService:
             return embedding[:100]  # Limit size
             
         except Exception as e:
-            print(f"Error creating voice embedding: {e}")
+            logger.warning("Error creating voice embedding: %s", e)
             # Return random normalized vector as fallback
             random_vector = np.random.random(50)
             norm = np.linalg.norm(random_vector)
             return (random_vector / norm).tolist()
     
+    @functools.cached_property
+    def voice_hashing_vectorizer(self) -> "HashingVectorizer":
+        """Stateless voice embedding vectorizer, created on first use"""
+        # sklearn (and scipy under it) is imported here rather than at module
+        # load, keeping it off API and worker startup
+        from sklearn.feature_extraction.text import HashingVectorizer
+        
+        return HashingVectorizer(
+            n_features=VOICE_EMBEDDING_FEATURES,
+            stop_words='english',
+            alternate_sign=False
+        )
+    
+    def _load_voice_vectorizer(self) -> Optional["TfidfVectorizer"]:
+        """Voice vectorizer fitted offline on a neutral corpus, if one is configured"""
+        path = settings.VOICE_VECTORIZER_PATH
+        if not path or not os.path.exists(path):
+            return None
+        
+        import joblib
+        
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            logger.warning("Error loading voice vectorizer from %s: %s", path, e)
+            return None
+    
     def _combine_tone_analysis(self, linguistic: Dict, stylistic: Dict, ai: Dict) -> Dict[str, int]:
         """Combine tone analysis from different methods"""
         # Get AI tone as base
@@ -1018,11 +1478,12 @@ class AIService:
         
         # Basic analysis
         word_count = len(combined_text.split())
-        sentence_count = len(re.split(r'[.!?]+', combined_text))
+        sentence_count = len(SENTENCE_SPLIT_PATTERN.split(combined_text))
         avg_sentence_length = word_count / max(sentence_count, 1)
         
         # Determine tone based on patterns
-        formal_score = 40 + min(30, len(re.findall(r'\b(?:furthermore|however|therefore|consequently)\b', combined_text.lower())) * 10)
+        combined_lower = combined_text.lower()
+        formal_score = 40 + min(30, len(FORMAL_CONNECTIVE_PATTERN.findall(combined_lower)) * 10)
         punchy_score = 30 + min(40, combined_text.count('!') * 15)
         
         return {
@@ -1035,12 +1496,12 @@ class AIService:
             },
             "style": {
                 "personality": ["analytical", "direct", "professional"],
-                "vocabulary": re.findall(r'\b\w{6,}\b', combined_text.lower())[:10],
+                "vocabulary": VOCABULARY_WORD_PATTERN.findall(combined_lower)[:10],
                 "structure": ["clear", "structured"]
             },
             "metrics": {
                 "avg_sentence_length": avg_sentence_length,
-                "complexity_score": len(re.findall(r'\b\w{8,}\b', combined_text)) / word_count * 100,
+                "complexity_score": len(LONG_WORD_PATTERN.findall(combined_text)) / word_count * 100,
                 "confidence_level": 0.6
             },
             "summary": f"Voice profile created from {len(samples)} samples with {word_count} total words",
@@ -1056,11 +1517,13 @@ class AIService:
         themes = user_profile.get("themes", [])
         voice_profile = user_profile.get("voice_profile", {})
         
+        # Sorted, so the same profile always yields the same context string
+        # (and cache keys) regardless of how its lists were loaded
         context_parts = []
         if goals:
-            context_parts.append(f"Goals: {', '.join(goals)}")
+            context_parts.append(f"Goals: {', '.join(sorted(goals))}")
         if themes:
-            context_parts.append(f"Themes: {', '.join(themes)}")
+            context_parts.append(f"Themes: {', '.join(sorted(themes))}")
         if voice_profile:
             tone = voice_profile.get("tone", {})
             style = voice_profile.get("style", {})
@@ -1069,97 +1532,156 @@ class AIService:
         
         return "; ".join(context_parts)
     
-    def _create_content_generation_prompt(self, context: str, platform: str) -> str:
+    def _create_content_generation_prompt(self, context: str, platform: str) -> SystemPrompt:
         """Create system prompt for content generation"""
-        platform_specs = {
-            "twitter": "280 characters max, engaging, hashtag-friendly",
-            "linkedin": "professional, thought leadership, longer form allowed"
-        }
-        
-        spec = platform_specs.get(platform, platform_specs["twitter"])
-        
-        return f"""
-        You are a personal AI content creation assistant. Generate high-quality social media posts based on the user's profile and preferences.
-        
-        User Context: {context}
-        Platform: {platform} ({spec})
+        spec = PLATFORM_SPECS.get(platform, PLATFORM_SPECS["twitter"])
         
-        Guidelines:
-        - Match the user's voice and style
-        - Create engaging, valuable content
-        - Include relevant hashtags when appropriate
-        - Focus on the user's themes and goals
-        - Make each post unique and compelling
-        """
+        return CONTENT_GENERATION_PREAMBLE, f"User Context: {context}\nPlatform: {platform} ({spec})"
     
-    def _create_chat_system_prompt(self, context: str) -> str:
+    def _create_chat_system_prompt(self, context: str) -> SystemPrompt:
         """Create system prompt for chat consultation"""
-        return f"""
-        You are a personal AI assistant specialized in content strategy and social media growth. 
-        You provide concise, actionable advice and can suggest specific actions.
-        
-        User Context: {context}
-        
-        When appropriate, suggest actions like:
-        - generate_draft: Create content drafts
-        - create_task: Add tasks to Notion
-        - schedule_post: Schedule content
-        
-        Be concise, decisive, and focus on actionable insights.
-        """
+        return CHAT_SYSTEM_PREAMBLE, f"User Context: {context}"
     
-    async def _generate_with_openai(self, system_prompt: str, user_prompt: str, count: int) -> List[str]:
-        """Generate content using OpenAI"""
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+    def _openai_system_messages(self, system_prompt: SystemPrompt) -> List[Dict[str, str]]:
+        """System messages with the static preamble first, so it forms a shared prefix"""
+        preamble, context_block = system_prompt
+        return [
+            {"role": "system", "content": preamble},
+            {"role": "system", "content": context_block}
+        ]
+    
+    def _anthropic_system_blocks(self, system_prompt: SystemPrompt) -> List[Dict[str, Any]]:
+        """System blocks with a cache breakpoint after the static preamble"""
+        preamble, context_block = system_prompt
+        return [
+            {"type": "text", "text": preamble, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": context_block}
+        ]
+    
+    async def _generate_with_openai(self, system_prompt: SystemPrompt, user_prompt: str, count: int) -> List[Dict[str, Any]]:
+        """Generate content using OpenAI, with variants and themes in the same JSON response"""
+        response = await self._llm_call(
+            self.openai_client.chat.completions.create,
+            dedupe_key=llm_cache_key("drafts", DRAFT_GENERATION_MODEL, 0.7, [*system_prompt, user_prompt, count]),
+            model=DRAFT_GENERATION_MODEL,
             messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Generate {count} different posts about: {user_prompt}"}
+                *self._openai_system_messages(system_prompt),
+                {"role": "user", "content": f"Generate {count} different posts about: {user_prompt}\n\n{DRAFTS_JSON_FORMAT}"}
             ],
+            response_format={"type": "json_object"},
             temperature=0.7
         )
         
-        content = response.choices[0].message.content
-        # Parse the response to extract individual posts
-        posts = [post.strip() for post in content.split('\n\n') if post.strip()]
-        return posts[:count]
+        return self._parse_json_drafts(response.choices[0].message.content, count)
+    
+    def _parse_json_drafts(self, content: str, count: int) -> List[Dict[str, Any]]:
+        """Parse a {"drafts": [...]} response, skipping malformed entries"""
+        drafts = []
+        for entry in orjson.loads(content).get("drafts", []):
+            if not isinstance(entry, dict) or not isinstance(entry.get("content"), str) or not entry["content"].strip():
+                continue
+            variants = [v for v in entry.get("variants") or [] if isinstance(v, str) and v.strip()]
+            themes = [t for t in entry.get("themes") or [] if isinstance(t, str) and t.strip()]
+            drafts.append({
+                "content": entry["content"].strip(),
+                "variants": variants[:3] if len(drafts) < 3 else None,
+                "themes": themes[:3]
+            })
+        return drafts[:count]
+    
+    def _chat_model(self, messages: List[Dict[str, str]]) -> str:
+        """Model for a chat turn, chosen from the latest user message"""
+        tier = "strong" if CHAT_STRONG_TRIGGERS.search(messages[-1]["content"]) else "small"
+        return CHAT_MODEL_TIERS[tier]
     
-    async def _chat_with_openai(self, system_prompt: str, messages: List[Dict[str, str]]) -> Dict[str, str]:
+    async def _chat_with_openai(self, system_prompt: SystemPrompt, messages: List[Dict[str, str]]) -> Dict[str, str]:
         """Chat completion using OpenAI"""
-        formatted_messages = [{"role": "system", "content": system_prompt}]
+        formatted_messages = self._openai_system_messages(system_prompt)
         formatted_messages.extend(messages)
         
-        response = await self.openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await self._llm_call(
+            self.openai_client.chat.completions.create,
+            model=self._chat_model(messages),
             messages=formatted_messages,
             temperature=0.6
         )
         
         return {"content": response.choices[0].message.content}
     
-    def _mock_content_generation(self, count: int, platform: str) -> List[Dict[str, Any]]:
-        """Mock content generation for demo purposes"""
-        mock_contents = [
-            "🚀 Just discovered a game-changing AI tool that's revolutionizing content creation. The future of marketing is here! #AI #ContentMarketing #Innovation",
-            "Stop overthinking your content strategy. Start with these 3 simple questions: Who? What? Why? Everything else follows. #ContentStrategy #Marketing",
-            "The best content doesn't sell. It serves. Focus on adding value first, and the sales will follow naturally. #ContentMarketing #Value",
-            "Your audience doesn't want perfect content. They want authentic, helpful, and consistent content. Be real. #Authenticity #Content",
-            "Content creation tip: Write for one person, not everyone. When you try to speak to everyone, you speak to no one. #ContentTips #Marketing"
-        ]
+    async def _chat_with_anthropic(self, system_prompt: SystemPrompt, messages: List[Dict[str, str]]) -> Dict[str, str]:
+        """Chat completion using Anthropic Claude"""
+        # The Messages API requires the conversation to open with a user turn
+        start = next((i for i, message in enumerate(messages) if message["role"] == "user"), len(messages))
+        
+        response = await self._llm_call(
+            self.anthropic_client.messages.create,
+            model="claude-3-sonnet-20240229",
+            max_tokens=1000,
+            system=self._anthropic_system_blocks(system_prompt),
+            messages=messages[start:],
+            temperature=0.6
+        )
         
-        drafts = []
-        for i in range(min(count, len(mock_contents))):
-            draft = {
-                "content": mock_contents[i],
-                "platform": platform,
-                "variants": None,
-                "best_time_score": 85 + (i * 2),
-                "themes": ["content marketing", "strategy"],
-                "moderation_status": "approved"
-            }
-            drafts.append(draft)
+        return {"content": response.content[0].text}
+    
+    def _take_hedge_budget(self) -> bool:
+        """Whether another hedge fits within LLM_HEDGE_MAX_RATIO of chat calls"""
+        if self._hedged_calls >= settings.LLM_HEDGE_MAX_RATIO * self._hedge_eligible_calls:
+            return False
+        self._hedged_calls += 1
+        return True
+    
+    async def _chat_with_hedging(self, system_prompt: SystemPrompt, messages: List[Dict[str, str]]) -> Dict[str, str]:
+        """OpenAI chat, raced against a backup Anthropic call when the reply is slow"""
+        if not (settings.LLM_HEDGE_CHAT and self.anthropic_client):
+            return await self._chat_with_openai(system_prompt, messages)
+        
+        self._hedge_eligible_calls += 1
+        primary = asyncio.create_task(self._chat_with_openai(system_prompt, messages))
+        tasks = {primary}
+        try:
+            # Only replies slower than the hedge delay (the tail) get a backup
+            done, _ = await asyncio.wait(tasks, timeout=settings.LLM_HEDGE_DELAY)
+            if done or not self._take_hedge_budget():
+                return await primary
+            
+            tasks.add(asyncio.create_task(self._chat_with_anthropic(system_prompt, messages)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    logger.warning("Hedged chat call failed: %r", task.exception())
+            
+            # Both failed: surface the primary's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _stream_chat_with_openai(self, system_prompt: SystemPrompt, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Chat completion using OpenAI, yielding content deltas as they arrive"""
+        formatted_messages = self._openai_system_messages(system_prompt)
+        formatted_messages.extend(messages)
         
-        return drafts
+        # The bulkhead slot is held until the stream is fully consumed
+        async with self._llm_semaphore:
+            stream = await self.openai_client.chat.completions.create(
+                model=self._chat_model(messages),
+                messages=formatted_messages,
+                temperature=0.6,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    def _mock_content_generation(self, count: int, platform: str) -> List[Dict[str, Any]]:
+        """Mock content generation for demo purposes"""
+        # Shallow copies: callers may update the draft dicts, and the only
+        # nested value (themes) is an immutable tuple
+        return [dict(draft) for draft in _mock_drafts(min(count, len(MOCK_CONTENTS)), platform)]
     
     def _mock_chat_response(self, user_message: str) -> Dict[str, Any]:
         """Mock chat response for demo"""
@@ -1202,8 +1724,7 @@ class AIService:
     
     def _calculate_best_time_score(self) -> float:
         """Calculate best time score (mock)"""
-        import random
-        return round(random.uniform(70, 95), 1)
+        return round(_RNG.uniform(70, 95), 1)
     
     def _extract_themes(self, content: str, user_profile: Optional[Dict[str, Any]]) -> List[str]:
         """Extract themes from content"""
@@ -1212,29 +1733,24 @@ class AIService:
             themes.extend(user_profile["themes"][:2])
         
         # Simple keyword-based theme extraction
-        content_lower = content.lower()
-        if "ai" in content_lower:
-            themes.append("AI")
-        if "marketing" in content_lower:
-            themes.append("marketing")
-        if "strategy" in content_lower:
-            themes.append("strategy")
+        themes.extend(match_simple_themes(content))
         
-        return list(set(themes))
+        return list(dict.fromkeys(themes))
     
     def _extract_actions(self, response_content: str) -> List[Dict[str, Any]]:
         """Extract potential actions from AI response"""
         actions = []
-        content_lower = response_content.lower()
+        # One scan collects every keyword present (substring matches, as before)
+        found = {keyword.lower() for keyword in ACTION_KEYWORDS.findall(response_content)}
         
-        if "generate" in content_lower and ("post" in content_lower or "content" in content_lower):
+        if "generate" in found and ("post" in found or "content" in found):
             actions.append({
                 "type": "generate_draft",
                 "label": "Generate Drafts",
                 "data": {"count": 5}
             })
         
-        if "task" in content_lower or "todo" in content_lower:
+        if "task" in found or "todo" in found:
             actions.append({
                 "type": "create_task", 
                 "label": "Create Task",
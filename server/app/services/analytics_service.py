@@ -0,0 +1,116 @@
+"""
+Analytics Rollup Service
+Pre-aggregates per-user daily draft and post counts into daily_user_rollups
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Tuple
+
+from sqlalchemy import Date, Update, delete, func, select, update
+
+from app.core.celery_app import celery_app
+from app.core.database import SessionLocal, dialect_insert
+from app.models.content import DailyUserRollup, Draft, Post
+
+# Days recomputed on each run: the longest analytics range, so every day a
+# report can read is rebuilt nightly (and backfilled on API startup)
+ROLLUP_LOOKBACK_DAYS = 90
+
+
+def rollup_daily_analytics(days: int = ROLLUP_LOOKBACK_DAYS) -> int:
+    """Rebuild rollups for the last `days` complete days; returns rows written
+
+    Rows for days in the window that no longer have any activity are deleted
+    """
+    today = datetime.utcnow().date()
+    window_start = datetime.combine(today - timedelta(days=days), time.min)
+    window_end = datetime.combine(today, time.min)
+    
+    rollups: Dict[Tuple[int, object], Dict[str, int]] = defaultdict(
+        lambda: {"drafts_generated": 0, "drafts_approved": 0, "posts_published": 0}
+    )
+    
+    db = SessionLocal()
+    try:
+        draft_day = func.date(Draft.created_at, type_=Date)
+        draft_counts = db.execute(
+            select(
+                Draft.user_id,
+                draft_day,
+                func.count(Draft.id),
+                func.count(Draft.id).filter(Draft.status == "approved")
+            )
+            .where(Draft.created_at >= window_start, Draft.created_at < window_end)
+            .group_by(Draft.user_id, draft_day)
+        )
+        for user_id, day, generated, approved in draft_counts:
+            rollups[(user_id, day)]["drafts_generated"] = generated
+            rollups[(user_id, day)]["drafts_approved"] = approved
+        
+        post_day = func.date(Post.published_at, type_=Date)
+        post_counts = db.execute(
+            select(Post.user_id, post_day, func.count(Post.id))
+            .where(Post.published_at >= window_start, Post.published_at < window_end)
+            .group_by(Post.user_id, post_day)
+        )
+        for user_id, day, published in post_counts:
+            rollups[(user_id, day)]["posts_published"] = published
+        
+        # Replaced in the same transaction, so readers never see the window empty
+        db.execute(
+            delete(DailyUserRollup).where(
+                DailyUserRollup.date >= window_start.date(),
+                DailyUserRollup.date < today
+            )
+        )
+        
+        if not rollups:
+            db.commit()
+            return 0
+        
+        stmt = dialect_insert(DailyUserRollup).values([
+            {"user_id": user_id, "date": day, **counts}
+            for (user_id, day), counts in rollups.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyUserRollup.user_id, DailyUserRollup.date],
+            set_={
+                "drafts_generated": stmt.excluded.drafts_generated,
+                "drafts_approved": stmt.excluded.drafts_approved,
+                "posts_published": stmt.excluded.posts_published,
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+        db.commit()
+        return len(rollups)
+        
+    finally:
+        db.close()
+
+
+def rollup_approvals_update(user_id: int, created_at: datetime) -> Update:
+    """UPDATE recounting approved drafts on the rollup row for a draft's creation day
+
+    A no-op for days that have not been rolled up yet, which are counted live
+    """
+    day = created_at.date()
+    day_start = datetime.combine(day, time.min)
+    approved = select(func.count(Draft.id)).where(
+        Draft.user_id == user_id,
+        Draft.status == "approved",
+        Draft.created_at >= day_start,
+        Draft.created_at < day_start + timedelta(days=1)
+    ).scalar_subquery()
+    
+    return update(DailyUserRollup)\
+        .where(DailyUserRollup.user_id == user_id, DailyUserRollup.date == day)\
+        .values(drafts_approved=approved, updated_at=func.now())
+
+
+# Celery Tasks
+@celery_app.task(name='rollup_daily_analytics')
+def rollup_daily_analytics_task(days: int = ROLLUP_LOOKBACK_DAYS):
+    """Nightly task to refresh analytics rollups"""
+    return rollup_daily_analytics(days)
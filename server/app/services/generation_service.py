@@ -0,0 +1,75 @@
+"""
+Draft Generation Service
+Runs AI draft generation outside the request path as a Celery task
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.cache import cache_delete_pattern_sync, user_content_cache_patterns
+from app.core.celery_app import celery_app, run_async
+from app.core.database import SessionLocal
+from app.models.content import Draft
+from app.services.ai_service import ai_service
+
+# User profile context for generation (mock for now)
+MOCK_GENERATION_PROFILE = {
+    "goals": ["grow audience", "thought leadership"],
+    "themes": ["AI", "content marketing", "strategy"],
+    "voice_profile": {
+        "tone": {"formal": 40, "punchy": 70, "contrarian": 30}
+    }
+}
+
+
+def draft_rows(user_id: int, prompt: Optional[str], drafts_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Map AI-generated drafts onto Draft column values for a bulk INSERT"""
+    return [
+        {
+            "user_id": user_id,
+            "content": draft_data["content"],
+            "platform": draft_data["platform"],
+            "variants": draft_data.get("variants"),
+            "best_time_score": draft_data.get("best_time_score"),
+            "moderation_status": draft_data.get("moderation_status", "approved"),
+            "themes": draft_data.get("themes"),
+            "prompt_used": prompt
+        }
+        for draft_data in drafts_data
+    ]
+
+
+def generate_and_store_drafts(user_id: int, prompt: Optional[str], count: int, platform: str) -> List[int]:
+    """Generate drafts with the AI service and insert them; returns the new draft ids"""
+    drafts_data = run_async(ai_service.generate_content_drafts(
+        user_profile=MOCK_GENERATION_PROFILE,
+        prompt=prompt,
+        count=count,
+        platform=platform
+    ))
+    
+    rows = draft_rows(user_id, prompt, drafts_data)
+    if not rows:
+        return []
+    
+    db = SessionLocal()
+    try:
+        result = db.execute(insert(Draft).values(rows).returning(Draft.id))
+        draft_ids = sorted(result.scalars().all())
+        db.commit()
+    finally:
+        db.close()
+    
+    for pattern in user_content_cache_patterns(user_id):
+        cache_delete_pattern_sync(pattern)
+    
+    return draft_ids
+
+
+# Celery Tasks
+@celery_app.task(name='generate_content_task')
+def generate_content_task(user_id: int, prompt: Optional[str], count: int, platform: str):
+    """Background task to generate and store drafts"""
+    draft_ids = generate_and_store_drafts(user_id, prompt, count, platform)
+    return {"user_id": user_id, "draft_ids": draft_ids}
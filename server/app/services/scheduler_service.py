@@ -5,24 +5,33 @@ Handles content scheduling, publishing, and performance tracking
 
 import asyncio
 import json
+import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from celery import Celery
 
+from app.core.celery_app import celery_app
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.content import Draft, Post, EngagementMetrics
 from app.models.chat import Integration
 from app.services.oauth_service import oauth_manager
 
+logger = logging.getLogger(__name__)
 
-# Initialize Celery for background tasks
-celery_app = Celery(
-    'nexus_scheduler',
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
-)
+def scheduled_content_entry(draft: Draft) -> Dict[str, Any]:
+    """Summary of a scheduled draft as returned by the scheduled-content listings"""
+    return {
+        "id": draft.id,
+        "content": draft.content[:100] + "...",
+        "platform": draft.platform,
+        "scheduled_for": draft.scheduled_for.isoformat(),
+        "themes": draft.themes,
+        "best_time_score": draft.best_time_score
+    }
 
 
 class ContentScheduler:
@@ -96,7 +105,7 @@ class ContentScheduler:
             
             # Queue the publishing task
             task_result = schedule_publish_content.apply_async(
-                args=[draft_id],
+                args=[draft_id, scheduled_time.isoformat()],
                 eta=scheduled_time
             )
             
@@ -119,6 +128,252 @@ class ContentScheduler:
         finally:
             db.close()
     
+    async def _connected_platforms(self, db: AsyncSession, user_id: int) -> Set[str]:
+        """Platforms the user has a connected integration for"""
+        result = await db.execute(
+            select(Integration.type).where(
+                Integration.user_id == user_id,
+                Integration.status == "connected"
+            )
+        )
+        return set(result.scalars())
+    
+    async def _queue_publish_tasks(self, db: AsyncSession, results: List[Dict[str, Any]],
+                                   reverts: Dict[int, Dict[str, Any]],
+                                   superseded: Dict[int, str]) -> int:
+        """Queue publishing for committed schedules; returns how many were queued
+
+        The broker calls run in the threadpool. Each task carries the time it
+        was queued for and its id is stored in the draft's external_id; once a
+        draft's new task is queued, its `superseded` task is revoked. A draft
+        whose task can't be queued is reverted to its `reverts` values and its
+        result marked failed
+        """
+        pending = [result for result in results if result.get("success")]
+        if not pending:
+            return 0
+        
+        def queue_all() -> List[Any]:
+            outcomes = []
+            for result in pending:
+                draft_id = result["draft_id"]
+                try:
+                    outcomes.append(schedule_publish_content.apply_async(
+                        args=[draft_id, result["scheduled_for"].isoformat()],
+                        eta=result["scheduled_for"]
+                    ).id)
+                except Exception as e:
+                    outcomes.append(e)
+                    continue
+                
+                if superseded.get(draft_id):
+                    try:
+                        celery_app.control.revoke(superseded[draft_id], terminate=True)
+                    except Exception as e:
+                        # The old task still skips itself: its time no longer matches
+                        logger.warning("Failed to revoke publish task for draft %s: %s", draft_id, e)
+            return outcomes
+        
+        task_ids = []
+        failed = []
+        for result, outcome in zip(pending, await run_in_threadpool(queue_all)):
+            draft_id = result["draft_id"]
+            if isinstance(outcome, Exception):
+                failed.append({"id": draft_id, **reverts[draft_id]})
+                result.clear()
+                result.update({"draft_id": draft_id, "error": f"Failed to queue publishing: {outcome}"})
+                continue
+            
+            task_ids.append({"id": draft_id, "external_id": outcome})  # Repurpose external_id for task tracking
+            result["task_id"] = outcome
+            result["scheduled_for"] = result["scheduled_for"].isoformat()
+        
+        for rows in (task_ids, failed):
+            if rows:
+                await db.execute(update(Draft), rows)
+        await db.commit()
+        return len(task_ids)
+    
+    async def schedule_content_batch(self, db: AsyncSession, user_id: int,
+                                     items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Schedule several drafts with one draft SELECT and one bulk UPDATE"""
+        
+        try:
+            # A draft listed twice is scheduled once, with its last entry
+            items = list({item["draft_id"]: item for item in items}.values())
+            result = await db.execute(
+                select(Draft).where(
+                    Draft.id.in_([item["draft_id"] for item in items]),
+                    Draft.user_id == user_id
+                )
+            )
+            drafts = {draft.id: draft for draft in result.scalars()}
+            connected_platforms = await self._connected_platforms(db, user_id)
+            
+            now = datetime.now()
+            results = []
+            updates = []
+            reverts = {}
+            superseded = {}
+            for item in items:
+                draft_id = item["draft_id"]
+                draft = drafts.get(draft_id)
+                if not draft:
+                    results.append({"draft_id": draft_id, "error": "Draft not found"})
+                    continue
+                
+                if draft.platform not in connected_platforms:
+                    results.append({"draft_id": draft_id, "error": f"No connected {draft.platform} account"})
+                    continue
+                
+                scheduled_time = item.get("scheduled_time")
+                if scheduled_time is None or item.get("auto_optimize", True):
+                    scheduled_time = self._calculate_optimal_time(
+                        draft.platform,
+                        draft.content,
+                        user_id
+                    )
+                
+                if scheduled_time <= now:
+                    results.append({"draft_id": draft_id, "error": "Cannot schedule content in the past"})
+                    continue
+                
+                updates.append({"id": draft_id, "status": "scheduled", "scheduled_for": scheduled_time})
+                reverts[draft_id] = {"status": draft.status, "scheduled_for": draft.scheduled_for}
+                if draft.status == "scheduled":
+                    superseded[draft_id] = draft.external_id
+                results.append({
+                    "success": True,
+                    "draft_id": draft_id,
+                    "scheduled_for": scheduled_time,
+                    "platform": draft.platform,
+                    "optimal_score": self._calculate_timing_score(scheduled_time, draft.platform)
+                })
+            
+            if updates:
+                await db.execute(update(Draft), updates)
+                await db.commit()
+            
+            # Queue publishing only once the schedule is committed
+            scheduled = await self._queue_publish_tasks(db, results, reverts, superseded)
+            
+            return {
+                "success": True,
+                "scheduled": scheduled,
+                "results": results
+            }
+            
+        except Exception as e:
+            await db.rollback()
+            return {"error": str(e)}
+    
+    async def reschedule_content_batch(self, db: AsyncSession, user_id: int,
+                                       items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Move several scheduled drafts to new times with one SELECT and one bulk UPDATE
+
+        Each old publishing task is revoked once its replacement is queued. A
+        draft whose new task can't be queued keeps its old schedule
+        """
+        
+        try:
+            new_times = {item["draft_id"]: item["new_time"] for item in items}
+            result = await db.execute(
+                select(Draft).where(
+                    Draft.id.in_(list(new_times)),
+                    Draft.user_id == user_id,
+                    Draft.status == "scheduled"
+                )
+            )
+            drafts = {draft.id: draft for draft in result.scalars()}
+            connected_platforms = await self._connected_platforms(db, user_id)
+            
+            now = datetime.now()
+            results = []
+            updates = []
+            reverts = {}
+            superseded = {}
+            for draft_id, new_time in new_times.items():
+                draft = drafts.get(draft_id)
+                if not draft:
+                    results.append({"draft_id": draft_id, "error": "Scheduled draft not found"})
+                    continue
+                
+                if draft.platform not in connected_platforms:
+                    results.append({"draft_id": draft_id, "error": f"No connected {draft.platform} account"})
+                    continue
+                
+                if new_time <= now:
+                    results.append({"draft_id": draft_id, "error": "Cannot schedule content in the past"})
+                    continue
+                
+                updates.append({"id": draft_id, "scheduled_for": new_time})
+                reverts[draft_id] = {"scheduled_for": draft.scheduled_for}
+                superseded[draft_id] = draft.external_id
+                results.append({
+                    "success": True,
+                    "draft_id": draft_id,
+                    "scheduled_for": new_time,
+                    "platform": draft.platform,
+                    "optimal_score": self._calculate_timing_score(new_time, draft.platform)
+                })
+            
+            if updates:
+                await db.execute(update(Draft), updates)
+                await db.commit()
+            
+            rescheduled = await self._queue_publish_tasks(db, results, reverts, superseded)
+            
+            return {
+                "success": True,
+                "rescheduled": rescheduled,
+                "results": results
+            }
+            
+        except Exception as e:
+            await db.rollback()
+            return {"error": str(e)}
+    
+    async def cancel_scheduled_content_batch(self, db: AsyncSession, user_id: int,
+                                             draft_ids: List[int]) -> Dict[str, Any]:
+        """Cancel several scheduled drafts with one SELECT, one revoke and one bulk UPDATE"""
+        
+        try:
+            draft_ids = list(dict.fromkeys(draft_ids))
+            result = await db.execute(
+                select(Draft.id, Draft.external_id).where(
+                    Draft.id.in_(draft_ids),
+                    Draft.user_id == user_id,
+                    Draft.status == "scheduled"
+                )
+            )
+            cancelled = dict(result.all())
+            
+            # Cancel Celery tasks before the drafts are reset
+            task_ids = [task_id for task_id in cancelled.values() if task_id]
+            if task_ids:
+                await run_in_threadpool(celery_app.control.revoke, task_ids, terminate=True)
+            
+            if cancelled:
+                await db.execute(update(Draft), [
+                    {"id": draft_id, "status": "pending", "scheduled_for": None, "external_id": None}
+                    for draft_id in cancelled
+                ])
+                await db.commit()
+            
+            return {
+                "success": True,
+                "cancelled": len(cancelled),
+                "results": [
+                    {"success": True, "draft_id": draft_id} if draft_id in cancelled
+                    else {"draft_id": draft_id, "error": "Scheduled draft not found"}
+                    for draft_id in draft_ids
+                ]
+            }
+            
+        except Exception as e:
+            await db.rollback()
+            return {"error": str(e)}
+    
     async def cancel_scheduled_content(self, draft_id: int, user_id: int) -> Dict[str, Any]:
         """Cancel scheduled content"""
         
@@ -169,17 +424,7 @@ class ContentScheduler:
                 Draft.scheduled_for.between(datetime.now(), end_date)
             ).order_by(Draft.scheduled_for).all()
             
-            return [
-                {
-                    "id": draft.id,
-                    "content": draft.content[:100] + "...",
-                    "platform": draft.platform,
-                    "scheduled_for": draft.scheduled_for.isoformat(),
-                    "themes": draft.themes,
-                    "best_time_score": draft.best_time_score
-                }
-                for draft in scheduled_drafts
-            ]
+            return [scheduled_content_entry(draft) for draft in scheduled_drafts]
             
         finally:
             db.close()
@@ -287,8 +532,13 @@ class ContentPublisher:
     def __init__(self):
         self.oauth_manager = oauth_manager
     
-    async def publish_content(self, draft_id: int) -> Dict[str, Any]:
-        """Publish scheduled content to the appropriate platform"""
+    async def publish_content(self, draft_id: int,
+                              scheduled_for: Optional[str] = None) -> Dict[str, Any]:
+        """Publish scheduled content to the appropriate platform
+
+        A task queued for `scheduled_for` is skipped once the draft has been
+        rescheduled to another time
+        """
         
         db = SessionLocal()
         try:
@@ -301,6 +551,9 @@ class ContentPublisher:
             if not draft:
                 return {"error": "Scheduled draft not found"}
             
+            if scheduled_for is not None and draft.scheduled_for != datetime.fromisoformat(scheduled_for):
+                return {"error": "Draft was rescheduled"}
+            
             integration = db.query(Integration).filter(
                 Integration.user_id == draft.user_id,
                 Integration.type == draft.platform,
@@ -412,10 +665,10 @@ class ContentPublisher:
 
 # Celery Tasks
 @celery_app.task(name='schedule_publish_content')
-def schedule_publish_content(draft_id: int):
+def schedule_publish_content(draft_id: int, scheduled_for: Optional[str] = None):
     """Background task to publish scheduled content"""
     publisher = ContentPublisher()
-    result = asyncio.run(publisher.publish_content(draft_id))
+    result = asyncio.run(publisher.publish_content(draft_id, scheduled_for))
     return result
 
 
@@ -0,0 +1,74 @@
+"""
+Semantic Response Cache
+In-process nearest-neighbour cache of LLM replies, keyed by message similarity
+"""
+
+import functools
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+def _normalize(text: str) -> str:
+    # Punctuation and case don't change what is being asked
+    return _PUNCTUATION.sub(" ", text.lower())
+
+@functools.lru_cache(maxsize=1)
+def _vectorizer():
+    # Character n-gram hashing needs no fitting, so messages can be embedded as
+    # they arrive; rows are L2-normalized, making a dot product the cosine similarity.
+    # Built on first use so importing the cache doesn't load sklearn
+    from sklearn.feature_extraction.text import HashingVectorizer
+    
+    return HashingVectorizer(
+        analyzer="char_wb",
+        preprocessor=_normalize,
+        ngram_range=(3, 4),
+        n_features=2 ** 10,
+        alternate_sign=False,
+        norm="l2"
+    )
+
+
+class SemanticResponseCache:
+    """Per-scope store of (message embedding, response) pairs with LRU eviction"""
+
+    def __init__(self, threshold: float = 0.95, max_scopes: int = 256, max_entries: int = 16):
+        self.threshold = threshold
+        self.max_scopes = max_scopes
+        self.max_entries = max_entries
+        self._scopes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def embed(self, text: str) -> np.ndarray:
+        return _vectorizer().transform([text]).toarray()[0].astype(np.float32)
+
+    def lookup(self, scope: str, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Cached response for the most similar message in scope, if above the threshold"""
+        entries = self._scopes.get(scope)
+        if entries is None:
+            return None
+        self._scopes.move_to_end(scope)
+
+        similarities = entries["vectors"] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return dict(entries["responses"][best])
+
+    def store(self, scope: str, vector: np.ndarray, response: Dict[str, Any]) -> None:
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = {"vectors": np.empty((0, vector.shape[0]), dtype=np.float32), "responses": []}
+            self._scopes[scope] = entries
+            if len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        self._scopes.move_to_end(scope)
+
+        # Oldest entries fall off once the scope is full
+        entries["vectors"] = np.vstack([entries["vectors"], vector])[-self.max_entries:]
+        responses: List[Dict[str, Any]] = entries["responses"]
+        responses.append(dict(response))
+        del responses[:-self.max_entries]
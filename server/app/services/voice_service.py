@@ -0,0 +1,56 @@
+"""
+Voice Analysis Service
+Builds user voice profiles from writing samples, inline or as a Celery task
+"""
+
+from typing import Any, Dict, List
+
+from app.core.cache import cache_delete_sync, profile_cache_key
+from app.core.celery_app import celery_app, run_async
+from app.core.database import SessionLocal
+from app.models.user import UserProfile
+from app.services.ai_service import ai_service
+
+
+def build_voice_profile(user_id: int, samples: List[str], voice_analysis: Dict[str, Any],
+                        profile: UserProfile) -> Dict[str, Any]:
+    """Voice profile structure stored in UserProfile.voice_profile"""
+    return {
+        "id": f"voice_{user_id}",
+        "samples": samples,
+        "tone": voice_analysis.get("tone", {}),
+        "style": voice_analysis.get("style", {}),
+        "summary": voice_analysis.get("summary", ""),
+        "createdAt": profile.created_at.isoformat() if profile.created_at else None,
+        "updatedAt": profile.updated_at.isoformat() if profile.updated_at else None
+    }
+
+
+def analyze_and_store_voice(user_id: int, samples: List[str]) -> Dict[str, Any]:
+    """Analyze voice samples and save the result on the user's profile"""
+    voice_analysis = run_async(ai_service.analyze_voice_samples(samples))
+    if "error" in voice_analysis:
+        return voice_analysis
+
+    db = SessionLocal()
+    try:
+        profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+        if not profile:
+            profile = UserProfile(user_id=user_id)
+            db.add(profile)
+
+        profile.voice_profile = build_voice_profile(user_id, samples, voice_analysis, profile)
+        db.commit()
+    finally:
+        db.close()
+
+    cache_delete_sync(profile_cache_key(user_id))
+    return voice_analysis
+
+
+# Celery Tasks
+@celery_app.task(name='analyze_voice_task')
+def analyze_voice_task(user_id: int, samples: List[str]):
+    """Background task to analyze voice samples and update the profile"""
+    voice_analysis = analyze_and_store_voice(user_id, samples)
+    return {"user_id": user_id, "voice_analysis": voice_analysis}